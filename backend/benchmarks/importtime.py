@@ -0,0 +1,64 @@
+'''
+Cold-import cost of the API and graph modules, measured with `python -X importtime`.
+
+    uv run python -m backend.benchmarks.importtime backend.src.api.server backend.src.graph.workflow
+'''
+
+import os
+import re
+import sys
+import json
+import subprocess
+from typing import Dict, Any, List
+
+DEFAULT_MODULES = ["backend.src.api.server", "backend.src.graph.workflow"]
+
+_LINE_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+# packages the serverless path should not pull in until a node actually needs them
+HEAVY_PACKAGES = ["boto3", "langchain_aws", "langchain_community", "opensearchpy", "yt_dlp", "numpy", "cv2"]
+
+
+def measure(module: str, top: int = 10) -> Dict[str, Any]:
+    """Imports `module` in a fresh interpreter and summarizes the -X importtime trace."""
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=repo_root,
+        env={**os.environ, "OTEL_EXPORTER": "none"},
+        capture_output=True,
+        text=True,
+    )
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "module": name,
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": len(indent) // 2,
+            })
+
+    target = next((e for e in entries if e["module"] == module), None)
+    # root packages (e.g. langgraph, boto3) ranked by their own cumulative import cost
+    packages = [e for e in entries if "." not in e["module"] and e["depth"] > 0]
+    loaded = {e["module"].split(".")[0] for e in entries}
+    return {
+        "module": module,
+        "ok": completed.returncode == 0,
+        "total_ms": target["cumulative_ms"] if target else 0.0,
+        "modules_loaded": len(entries),
+        "heavy_packages_loaded": [p for p in HEAVY_PACKAGES if p in loaded],
+        "top": sorted(packages, key=lambda e: e["cumulative_ms"], reverse=True)[:top],
+    }
+
+
+def measure_all(modules: List[str] = None, top: int = 10) -> List[Dict[str, Any]]:
+    return [measure(module, top) for module in (modules or DEFAULT_MODULES)]
+
+
+if __name__ == "__main__":
+    print(json.dumps(measure_all(sys.argv[1:] or None), indent=2))
@@ -0,0 +1,268 @@
+'''
+Load generator for the /api/audit admission control, against the stand-ins.
+
+Runs three scenarios and checks the expected behaviour:
+  burst     - many clients, distinct videos, all at once: in-flight never exceeds
+              the cap, the overflow gets fast 503s with Retry-After
+  coalesce  - concurrent requests for the same video run the pipeline once
+  ratelimit - one client over its token bucket gets 429s with Retry-After, even
+              when it prepends spoofed X-Forwarded-For entries
+  queue     - queue-mode admission against an in-memory queue and workers: jobs
+              waiting on workers hold no slot, the backlog never exceeds the depth
+              cap, the overflow gets 503s and one video is enqueued once
+
+    uv run python -m backend.benchmarks.load --burst 40 --max-in-flight 4 --max-waiting 8
+'''
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from backend.benchmarks.stand_ins import apply_benchmark_environment
+
+# must run before the server module is imported
+apply_benchmark_environment()
+os.environ["ADMISSION_TRUSTED_PROXIES"] = "1"
+
+logger = logging.getLogger("audit-load")
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def pipeline_runs() -> int:
+    """Number of index_video node runs recorded so far (one per pipeline execution)."""
+    from backend.src.api import telemetry
+    return sum(1 for s in telemetry.memory_span_exporter.get_finished_spans() if s.name == "node.index_video")
+
+
+def use_controller(**settings):
+    """Swaps in a fresh admission controller for the next scenario."""
+    from backend.src.api import admission
+
+    rate_limiter = None
+    if settings.get("rate_per_minute"):
+        rate_limiter = admission.RateLimiter(settings.pop("rate_per_minute"), settings.pop("burst"))
+    settings.pop("rate_per_minute", None)
+    settings.pop("burst", None)
+    admission._controller = admission.AdmissionController(rate_limiter=rate_limiter, **settings)
+    return admission._controller
+
+
+async def fire(app, requests: List[Dict[str, Any]], sample_every: float = 0.01) -> Dict[str, Any]:
+    """Sends all requests at once; records status, latency and Retry-After per request."""
+    import httpx
+    from backend.src.api.admission import get_admission_controller
+
+    controller = get_admission_controller()
+    peak = {"in_flight": 0, "waiting": 0}
+    done = asyncio.Event()
+
+    async def sample():
+        while not done.is_set():
+            peak["in_flight"] = max(peak["in_flight"], controller._in_flight)
+            peak["waiting"] = max(peak["waiting"], controller._waiting)
+            await asyncio.sleep(sample_every)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=None) as client:
+        async def one(spec):
+            start = time.perf_counter()
+            response = await client.post("/api/audit", json={"video_url": spec["video_url"]},
+                                         headers={"X-Forwarded-For": spec["client"]})
+            return {
+                "status": response.status_code,
+                "latency_s": time.perf_counter() - start,
+                "retry_after": int(response.headers["retry-after"]) if "retry-after" in response.headers else None,
+            }
+
+        sampler = asyncio.create_task(sample())
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(spec) for spec in requests))
+        wall = time.perf_counter() - start
+        done.set()
+        await sampler
+
+    by_status: Dict[int, List[Dict[str, Any]]] = {}
+    for result in results:
+        by_status.setdefault(result["status"], []).append(result)
+    return {
+        "wall_s": wall,
+        "status_counts": {str(code): len(items) for code, items in sorted(by_status.items())},
+        "latency_by_status": {
+            str(code): {"max_s": max(r["latency_s"] for r in items), "mean_s": sum(r["latency_s"] for r in items) / len(items)}
+            for code, items in sorted(by_status.items())
+        },
+        "retry_after": sorted({r["retry_after"] for r in results if r["retry_after"] is not None}),
+        "peak": peak,
+        "controller": controller.metrics(),
+    }
+
+
+async def fire_queued(args, controller) -> Dict[str, Any]:
+    """Drives AdmissionController.run_queued directly; stands in for Redis with an asyncio queue and workers."""
+    from backend.src.api.admission import Rejected
+
+    loop = asyncio.get_running_loop()
+    pending: asyncio.Queue = asyncio.Queue()
+    jobs: Dict[str, asyncio.Future] = {}
+    peak = {"pending": 0, "queued": 0}
+    enqueued_videos: List[str] = []
+
+    async def worker():
+        while True:
+            job_id = await pending.get()
+            await asyncio.sleep(args.queue_job_s)
+            jobs[job_id].set_result({"status": "success", "job_id": job_id})
+
+    async def one(i: int, video_key: str):
+        async def enqueue() -> str:
+            job_id = uuid.uuid4().hex
+            jobs[job_id] = loop.create_future()
+            pending.put_nowait(job_id)
+            enqueued_videos.append(video_key)
+            peak["pending"] = max(peak["pending"], pending.qsize())
+            peak["queued"] = max(peak["queued"], controller._queued + 1)
+            return job_id
+
+        async def wait(job_id: str):
+            return await jobs[job_id]
+
+        async def depth() -> int:
+            await asyncio.sleep(0)   # a Redis round trip; lets the workers pick up jobs
+            return pending.qsize()
+
+        try:
+            await controller.run_queued(f"10.3.0.{i % 250}", video_key, enqueue, wait, depth)
+            return {"status": 200, "retry_after": None}
+        except Rejected as e:
+            return {"status": e.status_code, "retry_after": e.retry_after}
+
+    workers = [asyncio.create_task(worker()) for _ in range(args.queue_workers)]
+    start = time.perf_counter()
+    # the first `same_video` requests all ask for one video
+    keys = ["queue-same"] * args.same_video + [f"queue{i:06d}" for i in range(args.burst)]
+    results = await asyncio.gather(*(one(i, key) for i, key in enumerate(keys)))
+    wall = time.perf_counter() - start
+    for task in workers:
+        task.cancel()
+
+    counts: Dict[str, int] = {}
+    for result in results:
+        counts[str(result["status"])] = counts.get(str(result["status"]), 0) + 1
+    return {
+        "wall_s": wall,
+        "status_counts": dict(sorted(counts.items())),
+        "retry_after": sorted({r["retry_after"] for r in results if r["retry_after"] is not None}),
+        "peak": peak,
+        "same_video_enqueued": enqueued_videos.count("queue-same"),
+        "controller": controller.metrics(),
+    }
+
+
+def run_scenarios(args) -> Dict[str, Any]:
+    from backend.benchmarks.stand_ins import StandInProfile, install_stand_ins
+    from backend.src.api.server import app
+
+    install_stand_ins(StandInProfile(rekognition_job_s=args.rekognition_s, transcribe_job_s=args.transcribe_s,
+                                     llm_latency_s=args.llm_latency))
+    checks: Dict[str, bool] = {}
+    report: Dict[str, Any] = {}
+
+    # burst: distinct clients and videos, far more than cap + wait queue
+    use_controller(max_in_flight=args.max_in_flight, max_waiting=args.max_waiting, wait_timeout=args.wait_timeout)
+    burst = asyncio.run(fire(app, [{"client": f"10.0.0.{i % 250}", "video_url": f"https://youtu.be/burst{i:06d}"} for i in range(args.burst)]))
+    rejected = burst["status_counts"].get("503", 0)
+    report["burst"] = burst
+    checks["burst: in-flight never above cap"] = burst["peak"]["in_flight"] <= args.max_in_flight
+    checks["burst: wait queue never above bound"] = burst["peak"]["waiting"] <= args.max_waiting
+    checks["burst: overflow rejected with 503"] = rejected >= args.burst - args.max_in_flight - args.max_waiting
+    checks["burst: 503s carry Retry-After"] = rejected == 0 or bool(burst["retry_after"])
+    checks["burst: 503s are fast"] = rejected == 0 or burst["latency_by_status"]["503"]["max_s"] < 0.5 * burst["latency_by_status"].get("200", {}).get("max_s", float("inf"))
+
+    # coalesce: the same video from many clients at once
+    use_controller(max_in_flight=args.max_in_flight, max_waiting=args.max_waiting, wait_timeout=args.wait_timeout)
+    runs_before = pipeline_runs()
+    coalesce = asyncio.run(fire(app, [{"client": f"10.1.0.{i}", "video_url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ"} for i in range(args.same_video)]))
+    coalesce["pipeline_runs"] = pipeline_runs() - runs_before
+    report["coalesce"] = coalesce
+    checks["coalesce: one pipeline run"] = coalesce["pipeline_runs"] == 1
+    checks["coalesce: every request answered"] = coalesce["status_counts"].get("200", 0) == args.same_video
+
+    # ratelimit: one client, twice its burst allowance, spoofing a fresh X-Forwarded-For hop each time
+    use_controller(max_in_flight=args.max_in_flight, max_waiting=args.max_waiting, wait_timeout=args.wait_timeout,
+                   rate_per_minute=args.rate_per_minute, burst=args.rate_burst)
+    ratelimit = asyncio.run(fire(app, [{"client": f"203.0.113.{i}, 10.2.0.1", "video_url": f"https://youtu.be/rate{i:07d}"} for i in range(2 * args.rate_burst)]))
+    report["ratelimit"] = ratelimit
+    checks["ratelimit: burst admitted"] = ratelimit["status_counts"].get("200", 0) == args.rate_burst
+    checks["ratelimit: excess rejected with 429"] = ratelimit["status_counts"].get("429", 0) == args.rate_burst
+    checks["ratelimit: 429s carry Retry-After"] = bool(ratelimit["retry_after"])
+
+    # queue: more workers than the in-process cap, burst beyond the depth cap
+    controller = use_controller(max_in_flight=args.max_in_flight, max_waiting=args.max_waiting, wait_timeout=args.wait_timeout,
+                                max_queue_depth=args.max_queue_depth)
+    queued = asyncio.run(fire_queued(args, controller))
+    rejected = queued["status_counts"].get("503", 0)
+    report["queue"] = queued
+    checks["queue: waiting jobs hold no in-process slot"] = queued["peak"]["queued"] > args.max_in_flight
+    checks["queue: backlog never above depth cap"] = queued["peak"]["pending"] <= args.max_queue_depth
+    checks["queue: overflow rejected with 503"] = rejected >= args.burst - args.max_queue_depth - args.queue_workers
+    checks["queue: 503s carry Retry-After"] = rejected == 0 or bool(queued["retry_after"])
+    checks["queue: same video enqueued once"] = queued["same_video_enqueued"] == 1
+
+    report["checks"] = checks
+    report["settings"] = vars(args)
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load-test /api/audit admission control against local stand-ins.")
+    parser.add_argument("--burst", type=int, default=40, help="Simultaneous requests in the burst scenario")
+    parser.add_argument("--same-video", type=int, default=10, help="Simultaneous requests in the coalesce scenario")
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--max-waiting", type=int, default=8)
+    parser.add_argument("--wait-timeout", type=float, default=30)
+    parser.add_argument("--rate-per-minute", type=float, default=6)
+    parser.add_argument("--rate-burst", type=int, default=3)
+    parser.add_argument("--max-queue-depth", type=int, default=16)
+    parser.add_argument("--queue-workers", type=int, default=8, help="Stand-in worker slots in the queue scenario")
+    parser.add_argument("--queue-job-s", type=float, default=0.2, help="Stand-in job duration in the queue scenario")
+    parser.add_argument("--rekognition-s", type=float, default=0.3)
+    parser.add_argument("--transcribe-s", type=float, default=0.4)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--output", help="Result path (default: results/load-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    logger.setLevel(logging.INFO)
+
+    report = run_scenarios(args)
+    for name in ("burst", "coalesce", "ratelimit"):
+        scenario = report[name]
+        logger.info(f"{name:<10} {scenario['wall_s']:.2f}s statuses={scenario['status_counts']} "
+                    f"peak in-flight={scenario['peak']['in_flight']} waiting={scenario['peak']['waiting']} "
+                    f"retry-after={scenario['retry_after']}")
+    logger.info(f"coalesce   pipeline runs: {report['coalesce']['pipeline_runs']} for {args.same_video} requests")
+    queued = report["queue"]
+    logger.info(f"queue      {queued['wall_s']:.2f}s statuses={queued['status_counts']} peak backlog={queued['peak']['pending']} "
+                f"outstanding={queued['peak']['queued']} retry-after={queued['retry_after']}")
+    for check, passed in report["checks"].items():
+        logger.info(f"  [{'ok' if passed else 'FAIL'}] {check}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Results written to {output}")
+
+    if not all(report["checks"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+'''
+Throughput scaling of the Redis work queue with worker process count.
+
+Each worker process runs the real `AuditWorker` and graph against the offline
+stand-ins, so the only shared resource is Redis. Needs a reachable REDIS_URL.
+
+    REDIS_URL=redis://localhost:6379/0 uv run python -m backend.benchmarks.queue_scaling --workers 1 2 4 --jobs 32
+'''
+
+import os
+import json
+import time
+import uuid
+import logging
+import argparse
+import multiprocessing
+from datetime import datetime
+from typing import Dict, Any, List
+
+from backend.benchmarks.stand_ins import apply_benchmark_environment
+
+logger = logging.getLogger("queue-scaling")
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def _worker_main(prefix: str, concurrency: int, profile_kwargs: Dict[str, Any], ready):
+    apply_benchmark_environment()
+    os.environ["OTEL_EXPORTER"] = "none"
+    logging.basicConfig(level=logging.WARNING)
+
+    from backend.benchmarks.stand_ins import StandInProfile, install_stand_ins
+    from backend.src.services.job_queue import AuditJobQueue
+    from backend.src.worker.runner import AuditWorker
+    import backend.src.graph.workflow  # noqa: F401 - import before signalling ready
+
+    install_stand_ins(StandInProfile(**profile_kwargs))
+    queue = AuditJobQueue(url=os.environ["REDIS_URL"], prefix=prefix)
+    ready.set()
+    AuditWorker(queue, concurrency=concurrency, poll_interval=0.02).run_forever()
+
+
+def run_once(workers: int, jobs: int, concurrency: int, profile_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.src.services.job_queue import AuditJobQueue
+
+    prefix = f"botocop:bench:{uuid.uuid4().hex[:8]}"
+    queue = AuditJobQueue(url=os.environ["REDIS_URL"], prefix=prefix)
+
+    context = multiprocessing.get_context("spawn")
+    ready_events = [context.Event() for _ in range(workers)]
+    processes = [
+        context.Process(target=_worker_main, args=(prefix, concurrency, profile_kwargs, ready), daemon=True)
+        for ready in ready_events
+    ]
+    for process in processes:
+        process.start()
+    for ready in ready_events:
+        ready.wait(timeout=120)
+
+    start = time.perf_counter()
+    job_ids = [queue.enqueue({"video_url": f"https://youtu.be/scale{i:05d}", "video_id": uuid.uuid4().hex[:8]}) for i in range(jobs)]
+    failed = 0
+    for job_id in job_ids:
+        job = queue.wait(job_id, timeout=600)
+        if job is None or job["status"] != "done":
+            failed += 1
+    wall = time.perf_counter() - start
+
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+    keys = list(queue.redis.scan_iter(f"{prefix}:*"))
+    if keys:
+        queue.redis.delete(*keys)
+
+    return {"workers": workers, "concurrency": concurrency, "jobs": jobs, "failed": failed,
+            "wall_s": wall, "throughput_jobs_s": jobs / wall if wall else 0.0}
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Measure audit throughput against worker process count.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--jobs", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=1, help="Audits per worker process")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--output", help="Result path (default: results/queue-scaling-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    if not os.getenv("REDIS_URL"):
+        parser.error("REDIS_URL must point at a running Redis server")
+
+    profile_kwargs = {"llm_latency_s": args.llm_latency}
+    runs = [run_once(workers, args.jobs, args.concurrency, profile_kwargs) for workers in args.workers]
+
+    base = runs[0]["throughput_jobs_s"] / runs[0]["workers"] if runs and runs[0]["throughput_jobs_s"] else 0.0
+    for run in runs:
+        run["scaling_efficiency"] = run["throughput_jobs_s"] / (base * run["workers"]) if base else 0.0
+        logger.info(f"workers={run['workers']:<3} throughput={run['throughput_jobs_s']:.2f} jobs/s "
+                    f"efficiency={100 * run['scaling_efficiency']:.0f}% failed={run['failed']}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"queue-scaling-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"runs": runs}, f, indent=2)
+    logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+'''
+Offline end-to-end benchmark for the audit pipeline.
+
+Drives N concurrent requests through /api/audit with every external service
+replaced by the stand-ins in `stand_ins.py`, and writes a JSON report with
+latency percentiles, throughput, memory and a per-stage breakdown.
+
+    uv run python -m backend.benchmarks.run --requests 20 --concurrency 5
+    uv run python -m backend.benchmarks.run --compare backend/benchmarks/results/baseline.json
+'''
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import resource
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from backend.benchmarks.stand_ins import apply_benchmark_environment
+
+# must run before the server module is imported
+apply_benchmark_environment()
+
+logger = logging.getLogger("audit-benchmark")
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def stage_breakdown() -> Dict[str, Dict[str, float]]:
+    """Groups finished spans by name using the in-memory exporter."""
+    from backend.src.api import telemetry
+
+    if telemetry.memory_span_exporter is None:
+        return {}
+    durations: Dict[str, List[float]] = {}
+    for finished in telemetry.memory_span_exporter.get_finished_spans():
+        durations.setdefault(finished.name, []).append((finished.end_time - finished.start_time) / 1e9)
+    return {name: summarize(values) for name, values in sorted(durations.items())}
+
+
+async def drive(app, total: int, concurrency: int) -> Dict[str, Any]:
+    import httpx
+
+    latencies: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        async def one(i: int):
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/api/audit", json={"video_url": f"https://youtu.be/bench{i:05d}"})
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200 or response.json().get("status") == "failed":
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - start
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "failures": failures,
+        "wall_s": wall,
+        "throughput_rps": total / wall if wall else 0.0,
+        "latency_s": summarize(latencies),
+    }
+
+
+def run_benchmark(args) -> Dict[str, Any]:
+    from backend.benchmarks import importtime
+    from backend.benchmarks.stand_ins import StandInProfile, install_stand_ins
+
+    profile = StandInProfile(
+        video_bytes=int(args.video_mb * 1024 * 1024),
+        rekognition_job_s=args.rekognition_s,
+        transcribe_job_s=args.transcribe_s,
+        label_pages=args.label_pages,
+        labels_per_page=args.labels_per_page,
+        llm_latency_s=args.llm_latency,
+    )
+
+    tracemalloc.start()
+    import_start = time.perf_counter()
+    from backend.src.api.server import app
+    import backend.src.graph.workflow  # noqa: F401 - include graph import in the cold-start figure
+    import_s = time.perf_counter() - import_start
+    install_stand_ins(profile)
+
+    if args.warmup:
+        asyncio.run(drive(app, args.warmup, 1))
+        from backend.src.api import telemetry
+        if telemetry.memory_span_exporter is not None:
+            telemetry.memory_span_exporter.clear()
+        tracemalloc.reset_peak()
+
+    load = asyncio.run(drive(app, args.requests, args.concurrency))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "label": args.label,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "profile": vars(profile),
+        "import_s": import_s,
+        "import_time": importtime.measure_all() if args.importtime else [],
+        **load,
+        "memory": {
+            "tracemalloc_peak_mb": peak / 1024 / 1024,
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+        "stages": stage_breakdown(),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]):
+    """Logs relative change of the headline numbers against a previous run."""
+    def delta(new: float, old: float) -> str:
+        if not old:
+            return "n/a"
+        return f"{100 * (new - old) / old:+.1f}%"
+
+    rows = [
+        ("throughput_rps", current["throughput_rps"], baseline.get("throughput_rps", 0)),
+        ("latency p50", current["latency_s"]["p50"], baseline.get("latency_s", {}).get("p50", 0)),
+        ("latency p95", current["latency_s"]["p95"], baseline.get("latency_s", {}).get("p95", 0)),
+        ("latency p99", current["latency_s"]["p99"], baseline.get("latency_s", {}).get("p99", 0)),
+        ("tracemalloc peak MB", current["memory"]["tracemalloc_peak_mb"], baseline.get("memory", {}).get("tracemalloc_peak_mb", 0)),
+    ]
+    baseline_imports = {m["module"]: m["total_ms"] for m in baseline.get("import_time", [])}
+    for entry in current.get("import_time", []):
+        rows.append((f"import {entry['module']} ms", entry["total_ms"], baseline_imports.get(entry["module"], 0)))
+    for stage, stats in current["stages"].items():
+        old = baseline.get("stages", {}).get(stage, {}).get("p50", 0)
+        rows.append((f"{stage} p50", stats["p50"], old))
+
+    logger.info(f"Comparison against '{baseline.get('label')}' ({baseline.get('timestamp')}):")
+    for name, new, old in rows:
+        logger.info(f"  {name:<32} {new:>10.4f}  (was {old:.4f}, {delta(new, old)})")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of /api/audit against local stand-ins.")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--video-mb", type=float, default=2.0)
+    parser.add_argument("--rekognition-s", type=float, default=0.3, help="Fake Rekognition job duration")
+    parser.add_argument("--transcribe-s", type=float, default=0.4, help="Fake Transcribe job duration")
+    parser.add_argument("--label-pages", type=int, default=3)
+    parser.add_argument("--labels-per-page", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--no-importtime", dest="importtime", action="store_false", help="Skip the -X importtime cold-start summary")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output", help="Result path (default: results/<label>-<timestamp>.json)")
+    parser.add_argument("--compare", help="Previous result JSON to diff against")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    logger.setLevel(logging.INFO)
+
+    result = run_benchmark(args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{args.label}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    logger.info("=" * 60)
+    logger.info(f"{result['requests']} audits @ concurrency {result['concurrency']}: "
+                f"{result['throughput_rps']:.2f} req/s, {result['failures']} failures")
+    latency = result["latency_s"]
+    logger.info(f"latency p50={latency['p50']:.3f}s p95={latency['p95']:.3f}s p99={latency['p99']:.3f}s")
+    logger.info(f"memory peak={result['memory']['tracemalloc_peak_mb']:.1f}MB rss={result['memory']['max_rss_mb']:.1f}MB")
+    for entry in result["import_time"]:
+        logger.info(f"cold import {entry['module']}: {entry['total_ms']:.0f}ms, heavy: {entry['heavy_packages_loaded']}")
+    for stage, stats in result["stages"].items():
+        logger.info(f"  {stage:<32} n={stats['count']:<4} p50={stats['p50']:.4f}s p95={stats['p95']:.4f}s")
+    logger.info(f"Results written to {output}")
+    logger.info("=" * 60)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
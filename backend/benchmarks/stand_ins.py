@@ -0,0 +1,294 @@
+'''
+Offline stand-ins for yt-dlp, S3, Rekognition, Transcribe, Bedrock and OpenSearch.
+
+`install_stand_ins(profile)` patches the modules used by the audit graph so
+`video_audit_graph` runs end-to-end without network access.
+'''
+
+import os
+import json
+import time
+import uuid
+import threading
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+SAMPLE_TRANSCRIPT = (
+    "Hey everyone, welcome back to the channel. Today I am reviewing the new trail running shoes. "
+    "Huge thanks to our sponsor for sending these over, use promo code RUN20 for twenty percent off, "
+    "link in the description. The grip on wet rock is excellent and the cushioning held up over fifty kilometres. "
+)
+
+SAMPLE_RULES = [
+    "Influencers must disclose any material connection with a brand. Use clear terms such as \"#ad\" or \"Paid partnership\" at the start of the video.",
+    "Disclosures must be easy to notice and understand. Do not bury disclosures in a link, in the description or among other hashtags.",
+    "Video ads must not make unsubstantiated health claims or guarantees of results.",
+    "Skippable in-stream ads have no maximum length; non-skippable in-stream ads must be 15 seconds or shorter.",
+    "Products given for free or at a discount are a material connection and must be disclosed.",
+]
+
+CANNED_AUDIT = {
+    "compliance_result": [
+        {
+            "category": "Disclosure",
+            "description": "Sponsorship mentioned without a clear #ad disclosure at the start of the video.",
+            "severity": "Warning",
+            "suggestion": "Add a verbal and on-screen disclosure in the first seconds.",
+        }
+    ],
+    "final_status": "warning",
+    "final_report": "One disclosure issue found.",
+}
+
+
+@dataclass
+class StandInProfile:
+    """Tunable behaviour of the fake services."""
+    video_bytes: int = 2 * 1024 * 1024
+    video_duration_s: float = 95.0
+    download_latency_s: float = 0.05
+    upload_latency_s: float = 0.02
+    rekognition_job_s: float = 0.3
+    transcribe_job_s: float = 0.4
+    label_pages: int = 3
+    labels_per_page: int = 200
+    transcript_repeats: int = 20
+    llm_latency_s: float = 0.2
+    llm_input_tokens: int = 3000
+    llm_output_tokens: int = 250
+    rules: List[str] = field(default_factory=lambda: list(SAMPLE_RULES))
+
+
+# ---- yt-dlp ----
+
+class FakeYoutubeDL:
+    profile: StandInProfile = StandInProfile()
+
+    def __init__(self, opts):
+        self.outtmpl = opts.get("outtmpl", "temp_video.mp4")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def download(self, urls):
+        time.sleep(self.profile.download_latency_s)
+        with open(self.outtmpl, "wb") as f:
+            f.write(os.urandom(min(self.profile.video_bytes, 64 * 1024)) * max(1, self.profile.video_bytes // (64 * 1024)))
+        return 0
+
+    def extract_info(self, url, download=True):
+        if download:
+            self.download([url])
+        return {"id": url.rsplit("=", 1)[-1], "duration": self.profile.video_duration_s, "ext": "mp4"}
+
+
+# ---- AWS ----
+
+class FakeS3:
+    """moto-style in-memory object store."""
+    def __init__(self, profile: StandInProfile):
+        self.profile = profile
+        self.objects: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def upload_file(self, local_path, bucket, key):
+        time.sleep(self.profile.upload_latency_s)
+        with self._lock:
+            self.objects[f"{bucket}/{key}"] = os.path.getsize(local_path)
+
+
+class FakeRekognition:
+    def __init__(self, profile: StandInProfile):
+        self.profile = profile
+        self.jobs: Dict[str, float] = {}
+
+    def start_label_detection(self, Video):
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = time.monotonic()
+        return {"JobId": job_id}
+
+    def get_label_detection(self, JobId, NextToken=None):
+        started = self.jobs.get(JobId)
+        if started is None:
+            return {"JobStatus": "FAILED"}
+        if time.monotonic() - started < self.profile.rekognition_job_s:
+            return {"JobStatus": "IN_PROGRESS"}
+
+        page = int(NextToken or 0)
+        names = ["Person", "Shoe", "Footwear", "Outdoors", "Text", "Logo", "Mountain", "Trail"]
+        labels = [
+            {
+                "Timestamp": (page * self.profile.labels_per_page + i) * 200,
+                "Label": {"Name": names[i % len(names)], "Confidence": 90.0 + (i % 10)},
+            }
+            for i in range(self.profile.labels_per_page)
+        ]
+        response = {"JobStatus": "SUCCEEDED", "Labels": labels}
+        if page + 1 < self.profile.label_pages:
+            response["NextToken"] = str(page + 1)
+        return response
+
+
+class FakeTranscribe:
+    def __init__(self, profile: StandInProfile):
+        self.profile = profile
+        self.jobs: Dict[str, float] = {}
+
+    def delete_transcription_job(self, TranscriptionJobName):
+        self.jobs.pop(TranscriptionJobName, None)
+
+    def start_transcription_job(self, TranscriptionJobName, Media, MediaFormat, LanguageCode):
+        self.jobs[TranscriptionJobName] = time.monotonic()
+
+    def get_transcription_job(self, TranscriptionJobName):
+        started = self.jobs.get(TranscriptionJobName)
+        if started is None:
+            return {"TranscriptionJob": {"TranscriptionJobStatus": "FAILED", "FailureReason": "unknown job"}}
+        if time.monotonic() - started < self.profile.transcribe_job_s:
+            return {"TranscriptionJob": {"TranscriptionJobStatus": "IN_PROGRESS"}}
+        return {
+            "TranscriptionJob": {
+                "TranscriptionJobStatus": "COMPLETED",
+                "Transcript": {"TranscriptFileUri": f"fake://transcripts/{TranscriptionJobName}"},
+            }
+        }
+
+
+class FakeHttpResponse:
+    def __init__(self, payload: Dict[str, Any]):
+        self.content = json.dumps(payload).encode("utf-8")
+        self.status_code = 200
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class FakeSession:
+    """Replacement for boto3.Session handing out shared fake clients."""
+    clients: Dict[str, Any] = {}
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def client(self, name, *args, **kwargs):
+        return self.clients[name]
+
+    def get_credentials(self):
+        return SimpleNamespace(access_key="bench", secret_key="bench", token=None)
+
+
+# ---- Bedrock / OpenSearch ----
+
+class FakeChatBedrock:
+    profile: StandInProfile = StandInProfile()
+
+    def __init__(self, *args, **kwargs):
+        self.model_id = kwargs.get("model_id")
+
+    def invoke(self, messages):
+        from langchain_core.messages import AIMessage
+
+        time.sleep(self.profile.llm_latency_s)
+        return AIMessage(
+            content=json.dumps(CANNED_AUDIT),
+            usage_metadata={
+                "input_tokens": self.profile.llm_input_tokens,
+                "output_tokens": self.profile.llm_output_tokens,
+                "total_tokens": self.profile.llm_input_tokens + self.profile.llm_output_tokens,
+            },
+        )
+
+
+class FakeEmbeddings:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class FakeVectorStore:
+    """Local bag-of-words retriever over the profile's rule chunks."""
+    profile: StandInProfile = StandInProfile()
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def similarity_search(self, query, k=3, **kwargs):
+        from langchain_core.documents import Document
+
+        query_terms = set(query.lower().split())
+        scored = sorted(
+            enumerate(self.profile.rules),
+            key=lambda item: len(query_terms & set(item[1].lower().split())),
+            reverse=True,
+        )
+        return [Document(page_content=text, metadata={"id": f"rule-{i}"}) for i, text in scored[:k]]
+
+
+def _fake_requests_get(original_get):
+    def get(url, *args, **kwargs):
+        if str(url).startswith("fake://transcripts/"):
+            transcript = SAMPLE_TRANSCRIPT * FakeYoutubeDL.profile.transcript_repeats
+            items = [
+                {"type": "pronunciation", "start_time": f"{i * 0.4:.2f}", "end_time": f"{i * 0.4 + 0.3:.2f}", "alternatives": [{"content": word}]}
+                for i, word in enumerate(transcript.split())
+            ]
+            return FakeHttpResponse({"results": {"transcripts": [{"transcript": transcript}], "items": items}})
+        return original_get(url, *args, **kwargs)
+    return get
+
+
+def apply_benchmark_environment():
+    """Env defaults for offline runs; call before importing the API server or graph."""
+    # stage spans are collected in memory for the per-stage breakdown
+    os.environ.setdefault("OTEL_EXPORTER", "memory")
+    os.environ.setdefault("AUDIT_POLL_INTERVAL_SECONDS", "0.05")
+    os.environ.setdefault("AUDIT_POLL_MAX_RETRIES", "400")
+    # identical synthetic videos would otherwise all be served from the response cache
+    os.environ.setdefault("AUDIT_CACHE_ENABLED", "false")
+    # one client driving many requests: keep the per-client limit out of throughput runs
+    os.environ.setdefault("ADMISSION_RATE_PER_MINUTE", "0")
+    os.environ.setdefault("AWS_STORAGE_CONNECTION_STRING", "bench")
+    os.environ.setdefault("AWS_OPEN_AI_KEY", "bench")
+
+
+def install_stand_ins(profile: Optional[StandInProfile] = None) -> StandInProfile:
+    """Patches the audit pipeline's external dependencies in-process."""
+    import boto3
+    import requests
+    import yt_dlp
+    import langchain_aws
+    import opensearchpy
+    from langchain_community import vectorstores
+    from backend.src.services import video_index
+    from backend.src.graph import nodes
+
+    profile = profile or StandInProfile()
+    FakeYoutubeDL.profile = profile
+    FakeChatBedrock.profile = profile
+    FakeVectorStore.profile = profile
+    FakeSession.clients = {
+        "s3": FakeS3(profile),
+        "rekognition": FakeRekognition(profile),
+        "transcribe": FakeTranscribe(profile),
+    }
+
+    # the pipeline imports these lazily, so patch the libraries themselves
+    yt_dlp.YoutubeDL = FakeYoutubeDL
+    boto3.Session = FakeSession
+    if not getattr(requests.get, "_bench_stand_in", False):
+        requests.get = _fake_requests_get(requests.get)
+        requests.get._bench_stand_in = True
+
+    langchain_aws.ChatBedrock = FakeChatBedrock
+    langchain_aws.BedrockEmbeddings = FakeEmbeddings
+    vectorstores.OpenSearchVectorSearch = FakeVectorStore
+    opensearchpy.AWSV4SignerAuth = lambda credentials, region: None
+
+    # drop any real clients built before the stand-ins were installed
+    video_index.get_video_indexer_service.cache_clear()
+    nodes.get_auditor_clients.cache_clear()
+    nodes.get_vector_store.cache_clear()
+    return profile
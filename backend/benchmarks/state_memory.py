@@ -0,0 +1,129 @@
+'''
+Per-audit memory of the audit state: list-of-dicts/inline transcript versus the
+compact LabelStore/SegmentStore/BlobRef representation.
+
+    uv run python -m backend.benchmarks.state_memory --audits 100 --minutes 60
+'''
+
+import os
+import gc
+import json
+import random
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime
+from typing import Dict, Any, List, Callable
+
+logger = logging.getLogger("state-memory")
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+LABEL_VOCABULARY = ["Person", "Human", "Face", "Clothing", "Apparel", "Shoe", "Footwear", "Text", "Logo", "Outdoors",
+                    "Nature", "Mountain", "Trail", "Bottle", "Drink", "Food", "Car", "Vehicle", "Screen", "Electronics"]
+
+
+def synthetic_rekognition(minutes: int, labels_per_second: int, rng: random.Random) -> Dict[str, Any]:
+    labels = []
+    for ms in range(0, minutes * 60 * 1000, 1000 // labels_per_second):
+        labels.append({"Timestamp": ms, "Label": {"Name": rng.choice(LABEL_VOCABULARY), "Confidence": rng.uniform(70, 100)}})
+    return {"JobStatus": "SUCCEEDED", "Labels": labels}
+
+
+def synthetic_transcribe(minutes: int, rng: random.Random):
+    words, items, t = [], [], 0.0
+    for _ in range(minutes * 150):
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+        words.append(word)
+        items.append({"type": "pronunciation", "start_time": f"{t:.2f}", "end_time": f"{t + 0.3:.2f}", "alternatives": [{"content": word}]})
+        t += 0.4
+    return " ".join(words), items
+
+
+def legacy_state(rekognition: Dict[str, Any], transcript: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The pre-compact representation (as extract_data used to build it)."""
+    return {
+        "video_metadata": [
+            {"name": label["Label"]["Name"], "confidence": label["Label"]["Confidence"], "timestamp": label["Timestamp"]}
+            for label in rekognition["Labels"]
+        ],
+        "transcript": transcript,
+        "ocr_text": [],
+    }
+
+
+def compact_state(rekognition: Dict[str, Any], transcript: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    from backend.src.graph.compact_state import LabelStore, SegmentStore
+    from backend.src.services.blob_store import BlobStore
+
+    return {
+        "video_metadata": LabelStore.from_rekognition(rekognition["Labels"]),
+        "transcript": BlobStore.put(transcript, key_hint="bench"),
+        "transcript_segments": SegmentStore.from_transcribe_items(transcript, items),
+        "ocr_text": [],
+    }
+
+
+def measure(build: Callable, inputs: List[tuple]) -> Dict[str, float]:
+    """Builds one state per input and keeps them all alive, like concurrent audits would."""
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    states = [build(*args) for args in inputs]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del states
+    gc.collect()
+    retained = current - baseline
+    return {
+        "retained_mb": retained / 1024 / 1024,
+        "peak_mb": (peak - baseline) / 1024 / 1024,
+        "per_audit_kb": retained / len(inputs) / 1024,
+    }
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Compare per-audit state memory of the legacy and compact representations.")
+    parser.add_argument("--audits", type=int, default=100)
+    parser.add_argument("--minutes", type=int, default=60, help="Video length per audit")
+    parser.add_argument("--labels-per-second", type=int, default=10)
+    parser.add_argument("--output", help="Result path (default: results/state-memory-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    os.environ.setdefault("AUDIT_BLOB_DIR", tempfile.mkdtemp(prefix="botocop-bench-blobs-"))
+
+    # inputs are generated outside the measured window; only the state representation is counted
+    rng = random.Random(7)
+    inputs = []
+    for _ in range(args.audits):
+        transcript, items = synthetic_transcribe(args.minutes, rng)
+        inputs.append((synthetic_rekognition(args.minutes, args.labels_per_second, rng), transcript, items))
+
+    before = measure(legacy_state, inputs)
+    after = measure(compact_state, inputs)
+    result = {
+        "audits": args.audits,
+        "minutes_per_video": args.minutes,
+        "labels_per_video": len(inputs[0][0]["Labels"]),
+        "transcript_chars": len(inputs[0][1]),
+        "legacy": before,
+        "compact": after,
+        "reduction_pct": 100 * (1 - after["retained_mb"] / before["retained_mb"]) if before["retained_mb"] else 0.0,
+    }
+
+    logger.info(f"{args.audits} audits x {args.minutes} min, {result['labels_per_video']} labels each")
+    logger.info(f"legacy : {before['per_audit_kb']:.0f} KB/audit ({before['retained_mb']:.1f} MB total)")
+    logger.info(f"compact: {after['per_audit_kb']:.0f} KB/audit ({after['retained_mb']:.1f} MB total)")
+    logger.info(f"reduction: {result['reduction_pct']:.1f}%")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"state-memory-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    logger.info(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
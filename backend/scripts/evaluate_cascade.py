@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from backend.src.services.prescreen import prescreen_transcript, get_prescreener
+
+logger = logging.getLogger("cascade-evaluation")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(__file__), "../data/fixtures/cascade_labelled.json")
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for Claude/Titan cost estimates
+    return max(1, len(text or "") // 4)
+
+
+def run_full_audit(fixture: dict, mode: str) -> dict:
+    """Runs the real auditor node (needs AWS credentials) in the given AUDIT_MODE."""
+    from backend.src.graph.nodes import auto_content_node
+
+    os.environ["AUDIT_MODE"] = mode
+    os.environ["AUDIT_CACHE_ENABLED"] = "false"
+    state = {
+        "transcript": fixture["transcript"],
+        "ocr_text": fixture.get("ocr_text", []),
+        "video_metadata": fixture.get("video_metadata", []),
+    }
+    start = time.perf_counter()
+    result = auto_content_node(state)
+    return {"latency_s": time.perf_counter() - start, "violation": bool(result.get("compliance_result"))}
+
+
+def evaluate(fixtures_path: str, rules_text: str, full_latency_s: float, price_per_1k_input: float, live: bool) -> dict:
+    with open(fixtures_path) as f:
+        fixtures = json.load(f)
+
+    prescreener = get_prescreener(rules_text)
+    rules_tokens = estimate_tokens(rules_text) + 200  # instructions + JSON schema
+
+    rows = []
+    for fixture in fixtures:
+        start = time.perf_counter()
+        screen = prescreen_transcript(fixture["transcript"], rules_text, fixture.get("ocr_text", []), prescreener=prescreener)
+        prescreen_s = time.perf_counter() - start
+
+        full_tokens = rules_tokens + estimate_tokens(fixture["transcript"])
+        escalated_tokens = rules_tokens + sum(estimate_tokens(w["text"]) for w in screen["suspicious"]) if screen["escalate"] else 0
+
+        row = {
+            "id": fixture["id"],
+            "label": fixture["label"],
+            "escalated": screen["escalate"],
+            "suspicious_windows": len(screen["suspicious"]),
+            "windows": len(screen["windows"]),
+            "prescreen_s": prescreen_s,
+            "full_tokens": full_tokens,
+            "cascade_tokens": escalated_tokens,
+        }
+
+        if live:
+            full = run_full_audit(fixture, "single")
+            cascade = run_full_audit(fixture, "cascade")
+            row.update({
+                "full_latency_s": full["latency_s"],
+                "cascade_latency_s": cascade["latency_s"],
+                "full_violation": full["violation"],
+                "cascade_violation": cascade["violation"],
+            })
+        else:
+            row.update({
+                "full_latency_s": full_latency_s,
+                "cascade_latency_s": prescreen_s + (full_latency_s if screen["escalate"] else 0.0),
+            })
+        rows.append(row)
+
+    total = len(rows)
+    violations = [r for r in rows if r["label"] == "violation"]
+    agreement = sum(1 for r in rows if r["escalated"] == (r["label"] == "violation")) / total if total else 0.0
+    recall = sum(1 for r in violations if r["escalated"]) / len(violations) if violations else 1.0
+    full_tokens = sum(r["full_tokens"] for r in rows)
+    cascade_tokens = sum(r["cascade_tokens"] for r in rows)
+    full_latency = sum(r["full_latency_s"] for r in rows)
+    cascade_latency = sum(r["cascade_latency_s"] for r in rows)
+
+    summary = {
+        "fixtures": total,
+        "escalation_rate": sum(1 for r in rows if r["escalated"]) / total if total else 0.0,
+        "agreement_with_labels": agreement,
+        "violation_recall": recall,
+        "tokens_full": full_tokens,
+        "tokens_cascade": cascade_tokens,
+        "tokens_saved_pct": 100 * (1 - cascade_tokens / full_tokens) if full_tokens else 0.0,
+        "cost_saved_usd": (full_tokens - cascade_tokens) / 1000 * price_per_1k_input,
+        "latency_full_s": full_latency,
+        "latency_cascade_s": cascade_latency,
+        "latency_saved_pct": 100 * (1 - cascade_latency / full_latency) if full_latency else 0.0,
+        "live": live,
+    }
+    if live:
+        summary["agreement_with_full_model"] = sum(1 for r in rows if r["cascade_violation"] == r["full_violation"]) / total if total else 0.0
+    return {"summary": summary, "rows": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the pre-screen cascade against the full auditor on a labelled fixture set.")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--rules", help="Optional text file with regulation rules to feed the pre-screen")
+    parser.add_argument("--full-latency", type=float, default=8.0, help="Assumed full-model latency (s) when not running --live")
+    parser.add_argument("--price-per-1k-input", type=float, default=0.003, help="Full-model input price (USD / 1k tokens)")
+    parser.add_argument("--live", action="store_true", help="Call Bedrock for both modes instead of estimating")
+    parser.add_argument("--output", help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    rules_text = ""
+    if args.rules:
+        with open(args.rules) as f:
+            rules_text = f.read()
+
+    report = evaluate(args.fixtures, rules_text, args.full_latency, args.price_per_1k_input, args.live)
+
+    logger.info("=" * 60)
+    for key, value in report["summary"].items():
+        logger.info(f"{key} : {round(value, 4) if isinstance(value, float) else value}")
+    logger.info("=" * 60)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
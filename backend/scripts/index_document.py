@@ -1,4 +1,6 @@
 import os 
+import sys
+import json
 import logging 
 import glob
 from dotenv import load_dotenv
@@ -9,6 +11,9 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_aws import BedrockEmbeddings
 from langchain_community.vectorstores import OpenSearchVectorSearch
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from backend.src.services.rule_matcher import build_index , DEFAULT_INDEX_PATH
+
 logger = logging.getLogger("brand-compliance-rules")
 logging.basicConfig(level=logging.INFO , format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
@@ -123,5 +128,30 @@ def index_docs():
         else:
             logger.warning("No Documents were processed")
 
+
+def build_rule_index():
+    """
+    Extracts the mechanical rules (disclosure phrases, vague terms, duration limits)
+    from the same PDFs into the precompiled rule index the auditor matches against.
+    Needs no AWS access.
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    data_folder = os.path.join(current_dir , "../../backend/data")
+
+    documents = {}
+    for pdf_file in glob.glob(os.path.join(data_folder , "*.pdf")):
+        try:
+            raw_docs = PyPDFLoader(pdf_file).load()
+            documents[os.path.basename(pdf_file)] = "\n".join(doc.page_content for doc in raw_docs)
+        except Exception as e:
+            logger.error(f"Failed to read {pdf_file} for the rule index: {e}")
+
+    index = build_index(documents)
+    with open(DEFAULT_INDEX_PATH , "w") as f:
+        json.dump(index , f , indent=2)
+    logger.info(f"Rule index: {len(index['phrase_rules'])} phrase rules, {len(index['metadata_rules'])} metadata rules -> {DEFAULT_INDEX_PATH}")
+
+
 if __name__ == "__main__":
+    build_rule_index()
     index_docs()
@@ -0,0 +1,269 @@
+'''
+Admission control for /api/audit: per-client rate limits, a global in-flight cap
+with a bounded wait queue (or, in Redis queue mode, a cap on queue depth), and
+coalescing of concurrent audits of the same video.
+'''
+
+import os
+import re
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+logger = logging.getLogger("botocop-admission")
+
+_YOUTUBE_ID_RE = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})")
+
+
+def youtube_video_id(url: str) -> str:
+    """YouTube video ID of `url`, or the normalized URL when none can be found."""
+    match = _YOUTUBE_ID_RE.search(url or "")
+    return match.group(1) if match else (url or "").strip().lower()
+
+
+class Rejected(Exception):
+    """Raised when a request is not admitted; carries the HTTP status and Retry-After seconds."""
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """Token bucket per client key. `rate_per_minute <= 0` disables the limit."""
+    def __init__(self, rate_per_minute: float, burst: int, max_clients: int = 10000):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+        self._buckets: Dict[str, list] = {}
+
+    def check(self, key: str):
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_clients:
+                self._prune(now)
+            bucket = self._buckets[key] = [float(self.burst), now]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            raise Rejected(429, "Rate limit exceeded", math.ceil((1 - tokens) / self.rate))
+        bucket[0] = tokens - 1
+
+    def _prune(self, now: float):
+        # buckets that have refilled completely carry no state worth keeping
+        full = [key for key, (tokens, updated) in self._buckets.items() if tokens + (now - updated) * self.rate >= self.burst]
+        for key in full:
+            del self._buckets[key]
+        # still at the cap: drop the least recently used tenth so the table stays bounded
+        if len(self._buckets) >= self.max_clients:
+            stale = sorted(self._buckets, key=lambda key: self._buckets[key][1])[:max(1, self.max_clients // 10)]
+            for key in stale:
+                del self._buckets[key]
+
+
+class AdmissionController:
+    """
+    Caps concurrent audits at `max_in_flight`; up to `max_waiting` more wait at most
+    `wait_timeout` seconds for a slot, anything beyond that is rejected with 503.
+    Retry-After comes from the measured drain rate (completions per second).
+    Requests for a video that is already being audited join that run instead of
+    starting a new one.
+
+    In queue mode (`run_queued`) the audits run on worker processes, so the cap is
+    on the shared queue instead: a request is rejected when `max_queue_depth` jobs
+    are already pending, and holds nothing while it waits for its worker.
+    """
+    def __init__(self, max_in_flight: int, max_waiting: int, wait_timeout: float,
+                 rate_limiter: Optional[RateLimiter] = None, coalesce: bool = True,
+                 fallback_retry_after: int = 30, max_queue_depth: int = 64):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_waiting = max(0, max_waiting)
+        self.wait_timeout = wait_timeout
+        self.max_queue_depth = max(1, max_queue_depth)
+        self.rate_limiter = rate_limiter
+        self.coalesce = coalesce
+        self.fallback_retry_after = fallback_retry_after
+
+        self._loop = None
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._enqueue_lock = asyncio.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._queued = 0
+        self._shared: Dict[str, asyncio.Future] = {}
+        self._completions = deque(maxlen=50)
+        self._mean_duration: Optional[float] = None
+        self._stats = {"admitted": 0, "coalesced": 0, "rate_limited": 0, "overloaded": 0, "timed_out": 0}
+
+    def drain_rate(self) -> float:
+        """Audits completed per second over the recent completion window (0 if unknown)."""
+        now = time.monotonic()
+        recent = [t for t in self._completions if now - t <= 300]
+        if len(recent) < 2 or recent[-1] <= recent[0]:
+            return 0.0
+        return (len(recent) - 1) / (recent[-1] - recent[0])
+
+    def retry_after(self, ahead: Optional[int] = None) -> int:
+        """Seconds until a slot is likely free for a request arriving now (`ahead` requests in front of it)."""
+        ahead = (self._waiting if ahead is None else ahead) + 1
+        rate = self.drain_rate()
+        if rate > 0:
+            seconds = ahead / rate
+        elif self._mean_duration is not None:
+            seconds = self._mean_duration * math.ceil(ahead / self.max_in_flight)
+        else:
+            seconds = self.fallback_retry_after
+        return max(1, min(600, math.ceil(seconds)))
+
+    async def run(self, client_key: str, video_key: str, audit: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Admits one request and returns the (possibly shared) audit result; raises Rejected."""
+        return await self._admit(client_key, video_key, lambda: self._admitted(audit))
+
+    async def run_queued(self, client_key: str, video_key: str, enqueue: Callable[[], Awaitable[str]],
+                         wait: Callable[[str], Awaitable[Any]], queue_depth: Callable[[], Awaitable[int]]) -> Any:
+        """
+        Queue-mode admission: checks `queue_depth()` against `max_queue_depth`, then
+        `enqueue()`s the job and returns `wait(job_id)`. Only the check and enqueue are
+        serialized; waiting for the worker takes no slot. Raises Rejected.
+        """
+        return await self._admit(client_key, video_key, lambda: self._enqueued(enqueue, wait, queue_depth))
+
+    async def _admit(self, client_key: str, video_key: str, start: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # asyncio primitives belong to one event loop (a new one per asyncio.run in scripts)
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._enqueue_lock = asyncio.Lock()
+            self._shared.clear()
+
+        if self.rate_limiter is not None:
+            try:
+                self.rate_limiter.check(client_key)
+            except Rejected:
+                self._stats["rate_limited"] += 1
+                raise
+
+        if self.coalesce:
+            shared = self._shared.get(video_key)
+            if shared is not None:
+                self._stats["coalesced"] += 1
+                logger.info(f"Joining in-flight audit of {video_key}")
+                return await asyncio.shield(shared)
+
+        # the shared task also does the single wait for the result, so joiners never need
+        # their own (a queue job signals completion once)
+        task = asyncio.ensure_future(start())
+        if self.coalesce:
+            self._shared[video_key] = task
+            task.add_done_callback(lambda _: self._shared.pop(video_key, None))
+        return await asyncio.shield(task)
+
+    async def _admitted(self, audit: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        if self._semaphore.locked():
+            if self._waiting >= self.max_waiting:
+                self._stats["overloaded"] += 1
+                raise Rejected(503, "Audit capacity exhausted", self.retry_after())
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.wait_timeout)
+            except asyncio.TimeoutError:
+                self._stats["timed_out"] += 1
+                raise Rejected(503, "Timed out waiting for audit capacity", self.retry_after())
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+        self._in_flight += 1
+        self._stats["admitted"] += 1
+        start = time.monotonic()
+        try:
+            return await audit()
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+            self._record_completion(start)
+
+    async def _enqueued(self, enqueue: Callable[[], Awaitable[str]], wait: Callable[[str], Awaitable[Any]],
+                        queue_depth: Callable[[], Awaitable[int]]) -> Any:
+        # one depth check + enqueue at a time, so a burst cannot overshoot the cap from this instance
+        async with self._enqueue_lock:
+            depth = await queue_depth()
+            if depth >= self.max_queue_depth:
+                self._stats["overloaded"] += 1
+                raise Rejected(503, "Audit queue is full", self.retry_after(depth))
+            job_id = await enqueue()
+
+        self._queued += 1
+        self._stats["admitted"] += 1
+        start = time.monotonic()
+        try:
+            return await wait(job_id)
+        finally:
+            self._queued -= 1
+            self._record_completion(start)
+
+    def _record_completion(self, start: float):
+        finished = time.monotonic()
+        self._completions.append(finished)
+        duration = finished - start
+        self._mean_duration = duration if self._mean_duration is None else 0.8 * self._mean_duration + 0.2 * duration
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "queued": self._queued,
+            "max_in_flight": self.max_in_flight,
+            "max_waiting": self.max_waiting,
+            "max_queue_depth": self.max_queue_depth,
+            "drain_rate_per_s": round(self.drain_rate(), 4),
+            "retry_after_s": self.retry_after(),
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Process-wide controller built from ADMISSION_* env vars, or None when ADMISSION_ENABLED is off."""
+    global _controller
+    if os.getenv("ADMISSION_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    if _controller is None:
+        _controller = AdmissionController(
+            max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "4")),
+            max_waiting=int(os.getenv("ADMISSION_MAX_WAITING", "16")),
+            wait_timeout=float(os.getenv("ADMISSION_WAIT_TIMEOUT_SECONDS", "30")),
+            rate_limiter=RateLimiter(
+                rate_per_minute=float(os.getenv("ADMISSION_RATE_PER_MINUTE", "6")),
+                burst=int(os.getenv("ADMISSION_BURST", "3")),
+            ),
+            coalesce=os.getenv("ADMISSION_COALESCE", "true").lower() in ("1", "true", "yes"),
+            max_queue_depth=int(os.getenv("ADMISSION_MAX_QUEUE_DEPTH", "64")),
+        )
+    return _controller
+
+
+def client_key(host: Optional[str], forwarded_for: Optional[str]) -> str:
+    """
+    Rate-limit key. Behind ADMISSION_TRUSTED_PROXIES proxies the client address is the
+    Nth X-Forwarded-For entry from the right (each proxy appends its peer; anything
+    further left is client-supplied). Otherwise the peer address.
+    """
+    trusted = int(os.getenv("ADMISSION_TRUSTED_PROXIES", "0"))
+    if trusted > 0 and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if len(hops) >= trusted:
+            return hops[-trusted]
+    return host or "unknown"
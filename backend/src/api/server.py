@@ -1,10 +1,15 @@
 import os
+import time
 import uuid
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -14,7 +19,34 @@ load_dotenv(override=True)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("botocop-web")
 
-app = FastAPI(title="BotoCop Web API")
+def warm_up():
+    """Imports and compiles the graph and builds the AWS/Bedrock clients."""
+    start = time.perf_counter()
+    try:
+        from backend.src.graph.workflow import video_audit_graph
+        from backend.src.graph.nodes import prewarm
+        prewarm()
+    except Exception as e:
+        # missing/invalid config must fail individual audits, not keep the server (health, frontend) down
+        logger.error(f"Audit graph pre-warm failed, continuing without it: {e}")
+        return
+    logger.info(f"Audit graph pre-warmed in {time.perf_counter() - start:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # long-running servers (Render) pay the import cost at boot instead of on the first audit;
+    # serverless (Vercel) leaves it off and imports lazily per request
+    if os.getenv("BOTOCOP_PREWARM", "false").lower() in ("1", "true", "yes"):
+        await asyncio.to_thread(warm_up)
+    yield
+
+
+app = FastAPI(title="BotoCop Web API", lifespan=lifespan)
+
+from backend.src.api.telemetry import instrument_app , record_queue_wait
+from backend.src.api.admission import get_admission_controller , client_key , youtube_video_id , Rejected
+instrument_app(app)
 
 # Setup CORS
 app.add_middleware(
@@ -27,45 +59,112 @@ app.add_middleware(
 # Request Model
 class AuditRequest(BaseModel):
     video_url: str
+    ad_format: Optional[str] = None
+
+def queue_mode() -> bool:
+    """AUDIT_QUEUE_MODE=redis hands audits to worker processes instead of running them here."""
+    return os.getenv("AUDIT_QUEUE_MODE", "inprocess").lower() == "redis"
+
+
+_job_queue = None
+
+def get_job_queue():
+    global _job_queue
+    if _job_queue is None:
+        from backend.src.services.job_queue import AuditJobQueue
+        _job_queue = AuditJobQueue.from_env()
+    return _job_queue
+
+
+async def enqueue_audit(request: AuditRequest, session_id: str) -> str:
+    payload = {"video_url": request.video_url, "video_id": session_id[:8], "ad_format": request.ad_format}
+    return await asyncio.to_thread(get_job_queue().enqueue, payload)
+
+
+async def await_audit_job(job_id: str):
+    """Waits for a worker to finish the job; 202 with the job id if it is still running."""
+    job = await get_job_queue().wait_async(job_id, float(os.getenv("AUDIT_QUEUE_WAIT_SECONDS", "900")))
+    if job is None:
+        # still running: the client can poll /api/audit/{job_id}
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued"})
+    # dead jobs that still produced an audit result answer like the in-process path
+    if "result" in job:
+        return job["result"]
+    raise HTTPException(status_code=500, detail=job.get("error", "Audit job failed"))
+
+
+async def queue_depth() -> int:
+    return (await asyncio.to_thread(get_job_queue().stats))["pending"]
+
+
+async def execute_audit(request: AuditRequest, session_id: str, received_at: float):
+    """Runs one admitted audit, on a worker process (queue mode) or a thread of this one."""
+    if queue_mode():
+        return await await_audit_job(await enqueue_audit(request, session_id))
+
+    # Lazy load the heavy graph only when needed
+    logger.info("Importing video audit graph...")
+    from backend.src.graph.workflow import run_video_audit
+
+    # Invoke the graph off the event loop so concurrent requests are not serialized
+    record_queue_wait(time.perf_counter() - received_at)
+    return await asyncio.to_thread(run_video_audit, request.video_url, session_id[:8], request.ad_format)
+
 
 @app.post("/api/audit")
-async def run_audit(request: AuditRequest):
+async def run_audit(request: AuditRequest, http_request: Request):
+    received_at = time.perf_counter()
     try:
-        # Lazy load the heavy graph only when needed
-        logger.info("Importing video audit graph...")
-        from backend.src.graph.workflow import video_audit_graph
-        
         session_id = str(uuid.uuid4())
         logger.info(f"Audit requested for: {request.video_url} (Session: {session_id})")
-        
-        input_data = {
-            "video_url": request.video_url,
-            "video_id": session_id[:8],
-            "compliance_result": [],
-            "error": []
-        }
-        
-        # Invoke the graph
-        result = video_audit_graph.invoke(input_data)
-        
-        return {
-            "success": result.get("final_status") == "success",
-            "video_id": result.get("video_id"),
-            "status": result.get("final_status"),
-            "report": result.get("final_report", "No report generated"),
-            "issues": result.get("compliance_result", []),
-            "errors": result.get("error", [])
-        }
-        
+
+        admission = get_admission_controller()
+        if admission is None:
+            return await execute_audit(request, session_id, received_at)
+
+        # concurrent requests for the same video (and ad format) share one pipeline run
+        client = client_key(http_request.client.host if http_request.client else None, http_request.headers.get("x-forwarded-for"))
+        video_key = f"{youtube_video_id(request.video_url)}:{request.ad_format or ''}"
+        if queue_mode():
+            # workers bound the throughput; this instance only bounds the backlog and holds no slot while waiting
+            return await admission.run_queued(client, video_key, lambda: enqueue_audit(request, session_id), await_audit_job, queue_depth)
+        return await admission.run(client, video_key, lambda: execute_audit(request, session_id, received_at))
+
+    except Rejected as e:
+        logger.warning(f"Audit rejected ({e.status_code}): {e.detail}; retry after {e.retry_after}s")
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Audit failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/audit/{job_id}")
+async def audit_status(job_id: str):
+    if not queue_mode():
+        raise HTTPException(status_code=404, detail="Job lookup requires AUDIT_QUEUE_MODE=redis")
+    job = await asyncio.to_thread(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return {"job_id": job_id, "status": job["status"], "attempts": job["attempts"], "result": job.get("result"), "error": job.get("error")}
+
 # Basic health check
 @app.get("/api/health")
 async def health():
     return {"status": "healthy"}
 
+# Cache hit rate and token savings
+@app.get("/api/metrics")
+async def metrics():
+    from backend.src.services.audit_cache import get_audit_cache
+    cache = get_audit_cache()
+    data = {"audit_cache": cache.metrics() if cache is not None else {"enabled": False}}
+    admission = get_admission_controller()
+    data["admission"] = admission.metrics() if admission is not None else {"enabled": False}
+    if queue_mode():
+        data["audit_queue"] = await asyncio.to_thread(get_job_queue().stats)
+    return data
+
 # Serve Frontend
 # server.py is in backend/src/api/
 # static is in backend/static/
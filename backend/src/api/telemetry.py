@@ -1 +1,176 @@
+'''
+OpenTelemetry tracing and per-stage metrics for the audit pipeline.
 
+Disabled by default. Set OTEL_EXPORTER to one of:
+    none    - no providers, helpers short-circuit (default)
+    console - print spans/metrics to stdout
+    otlp    - OTLP/gRPC to OTEL_EXPORTER_OTLP_ENDPOINT
+    azure   - Azure Monitor (APPLICATIONINSIGHTS_CONNECTION_STRING)
+    memory  - keep everything in memory (tests, benchmarks)
+'''
+
+import os
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger("botocop-telemetry")
+
+_lock = threading.Lock()
+_enabled = False
+_configured = False
+_tracer = None
+_stage_duration = None
+_queue_wait = None
+_bytes_transferred = None
+_tokens = None
+
+# populated only for OTEL_EXPORTER=memory
+memory_span_exporter = None
+memory_metric_reader = None
+
+
+def configure_telemetry(exporter: Optional[str] = None, service_name: str = "botocop") -> bool:
+    """
+    Installs tracer/meter providers for the chosen exporter. Only the first call
+    takes effect; later calls return whether telemetry is enabled.
+    """
+    global _enabled, _configured, _tracer, _stage_duration, _queue_wait, _bytes_transferred, _tokens
+    global memory_span_exporter, memory_metric_reader
+
+    exporter = (exporter or os.getenv("OTEL_EXPORTER", "none")).lower()
+    with _lock:
+        if _configured:
+            return _enabled
+        _configured = True
+        if exporter in ("", "none", "off", "false"):
+            return False
+
+        try:
+            from opentelemetry import trace, metrics
+
+            if exporter == "azure":
+                from azure.monitor.opentelemetry import configure_azure_monitor
+                configure_azure_monitor()
+            else:
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import SimpleSpanProcessor, BatchSpanProcessor
+                from opentelemetry.sdk.metrics import MeterProvider
+                from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+
+                resource = Resource.create({"service.name": service_name})
+                if exporter == "memory":
+                    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+                    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+                    memory_span_exporter = InMemorySpanExporter()
+                    memory_metric_reader = InMemoryMetricReader()
+                    span_processor = SimpleSpanProcessor(memory_span_exporter)
+                    metric_reader = memory_metric_reader
+                elif exporter == "console":
+                    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+                    from opentelemetry.sdk.metrics.export import ConsoleMetricExporter
+                    span_processor = SimpleSpanProcessor(ConsoleSpanExporter())
+                    metric_reader = PeriodicExportingMetricReader(ConsoleMetricExporter())
+                elif exporter == "otlp":
+                    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+                    from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+                    span_processor = BatchSpanProcessor(OTLPSpanExporter())
+                    metric_reader = PeriodicExportingMetricReader(OTLPMetricExporter())
+                else:
+                    raise ValueError(f"Unknown OTEL_EXPORTER: {exporter}")
+
+                tracer_provider = TracerProvider(resource=resource)
+                tracer_provider.add_span_processor(span_processor)
+                trace.set_tracer_provider(tracer_provider)
+                metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=[metric_reader]))
+
+            _tracer = trace.get_tracer("botocop")
+            meter = metrics.get_meter("botocop")
+            _stage_duration = meter.create_histogram("botocop.stage.duration", unit="s", description="Latency of each pipeline stage")
+            _queue_wait = meter.create_histogram("botocop.queue.wait", unit="s", description="Time an audit waited before the pipeline started")
+            _bytes_transferred = meter.create_histogram("botocop.bytes.transferred", unit="By", description="Bytes moved per transfer")
+            _tokens = meter.create_counter("botocop.llm.tokens", unit="{token}", description="LLM tokens by type")
+            _enabled = True
+            logger.info(f"Telemetry enabled with '{exporter}' exporter.")
+        except Exception as e:
+            logger.warning(f"Telemetry disabled, failed to configure '{exporter}' exporter: {e}")
+            _enabled = False
+        return _enabled
+
+
+def instrument_app(app):
+    """Adds FastAPI request spans when telemetry is enabled."""
+    if not configure_telemetry():
+        return
+    try:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        FastAPIInstrumentor.instrument_app(app, excluded_urls="api/health")
+    except Exception as e:
+        logger.warning(f"FastAPI instrumentation failed: {e}")
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Opens a span named `name` and records its duration in the stage-latency
+    histogram. Yields a do-nothing span when telemetry is off.
+    """
+    if not _enabled and (_configured or not configure_telemetry()):
+        yield _NOOP_SPAN
+        return
+    start = time.perf_counter()
+    with _tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None}) as current:
+        try:
+            yield current
+        finally:
+            _stage_duration.record(time.perf_counter() - start, {"stage": name})
+
+
+def traced(name: str):
+    """Decorator form of `span` for graph nodes."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_bytes(direction: str, num_bytes: int, **attributes):
+    if _enabled and num_bytes:
+        _bytes_transferred.record(num_bytes, {"direction": direction, **attributes})
+
+
+def record_queue_wait(seconds: float, **attributes):
+    if _enabled:
+        _queue_wait.record(seconds, attributes)
+
+
+def record_tokens(current_span, usage: Dict[str, Any], model: Optional[str] = None):
+    """Attaches token counts to the LLM span and the token counter."""
+    if not _enabled:
+        return
+    for key, value in usage.items():
+        current_span.set_attribute(f"llm.{key}", value or 0)
+        if value:
+            _tokens.add(value, {"type": key, "model": model or "unknown"})
+
+
+def is_enabled() -> bool:
+    return _enabled
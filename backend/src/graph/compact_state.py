@@ -0,0 +1,165 @@
+'''
+Compact, array-backed containers for the bulky parts of VideoAuditState.
+
+A long video yields tens of thousands of Rekognition detections; as a list of
+dicts each one costs several hundred bytes. These stores keep the same data in
+typed arrays with label names interned process-wide.
+'''
+
+import sys
+import bisect
+import threading
+from array import array
+from typing import Dict, Any, List, Iterable, Iterator, Optional
+
+_names: List[str] = []
+_name_ids: Dict[str, int] = {}
+_names_lock = threading.Lock()
+
+
+def intern_label(name: str) -> int:
+    """Maps a label name to a process-wide id (Rekognition's vocabulary is small)."""
+    label_id = _name_ids.get(name)
+    if label_id is None:
+        with _names_lock:
+            label_id = _name_ids.get(name)
+            if label_id is None:
+                label_id = len(_names)
+                _names.append(sys.intern(name))
+                _name_ids[name] = label_id
+    return label_id
+
+
+class LabelStore:
+    """
+    Label detections as parallel arrays. Iterates as the {"name", "confidence",
+    "timestamp"} dicts the rest of the pipeline already expects.
+    """
+    __slots__ = ("name_ids", "confidences", "timestamps")
+
+    def __init__(self):
+        self.name_ids = array("I")
+        self.confidences = array("f")
+        self.timestamps = array("q")
+
+    @classmethod
+    def from_rekognition(cls, labels: Iterable[Dict[str, Any]]) -> "LabelStore":
+        store = cls()
+        for label in labels:
+            detail = label.get("Label", {})
+            store.append(detail.get("Name") or "", detail.get("Confidence") or 0.0, label.get("Timestamp"))
+        return store
+
+    def append(self, name: str, confidence: float, timestamp: Optional[int]):
+        self.name_ids.append(intern_label(name))
+        self.confidences.append(confidence)
+        # -1 stands for "no timestamp" (image-level detections without one)
+        self.timestamps.append(-1 if timestamp is None else int(timestamp))
+
+    def __len__(self) -> int:
+        return len(self.name_ids)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        timestamp = self.timestamps[index]
+        return {
+            "name": _names[self.name_ids[index]],
+            "confidence": round(self.confidences[index], 3),
+            "timestamp": None if timestamp < 0 else timestamp,
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def names(self) -> List[str]:
+        """Distinct label names in first-seen order."""
+        return [_names[i] for i in dict.fromkeys(self.name_ids)]
+
+    def __repr__(self) -> str:
+        return repr(self.to_list())
+
+
+class SegmentStore:
+    """
+    Word-level transcript timing: character offset of each word in the transcript
+    text and its start time, used to put timestamps on text matches.
+    """
+    __slots__ = ("offsets", "start_ms")
+
+    def __init__(self):
+        self.offsets = array("I")
+        self.start_ms = array("I")
+
+    @classmethod
+    def from_transcribe_items(cls, transcript: str, items: Iterable[Dict[str, Any]]) -> "SegmentStore":
+        store = cls()
+        cursor = 0
+        for item in items:
+            if item.get("type") != "pronunciation" or "start_time" not in item:
+                continue
+            content = (item.get("alternatives") or [{}])[0].get("content", "")
+            offset = transcript.find(content, cursor) if content else -1
+            if offset < 0:
+                continue
+            store.offsets.append(offset)
+            store.start_ms.append(int(float(item["start_time"]) * 1000))
+            cursor = offset + len(content)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def timestamp_at(self, char_offset: int) -> Optional[int]:
+        """Start time (ms) of the word containing or preceding `char_offset`."""
+        if not self.offsets:
+            return None
+        index = bisect.bisect_right(self.offsets, char_offset) - 1
+        return self.start_ms[max(index, 0)]
+
+    def __repr__(self) -> str:
+        return f"SegmentStore({len(self)} words)"
+
+
+def summarize_labels(labels: Iterable[Dict[str, Any]], limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    One entry per distinct label name (detection count, first/last timestamp in ms,
+    max confidence), most frequent first and capped at `limit`. This is what goes
+    into the prompt: per-detection lists grow with video length.
+    """
+    summary: Dict[str, Dict[str, Any]] = {}
+    for label in labels or []:
+        name = label.get("name") if isinstance(label, dict) else str(label)
+        timestamp = label.get("timestamp") if isinstance(label, dict) else None
+        confidence = (label.get("confidence") if isinstance(label, dict) else None) or 0.0
+        entry = summary.get(name)
+        if entry is None:
+            entry = summary[name] = {"name": name, "count": 0, "first_ms": timestamp, "last_ms": timestamp, "max_confidence": 0.0}
+        entry["count"] += 1
+        entry["max_confidence"] = max(entry["max_confidence"], round(confidence, 3))
+        if timestamp is not None:
+            entry["first_ms"] = timestamp if entry["first_ms"] is None else min(entry["first_ms"], timestamp)
+            entry["last_ms"] = timestamp if entry["last_ms"] is None else max(entry["last_ms"], timestamp)
+    ranked = sorted(summary.values(), key=lambda entry: (-entry["count"], -entry["max_confidence"]))
+    return ranked[:max(0, limit)]
+
+
+def extend_in_place(left: Optional[list], right: Optional[list]) -> list:
+    """
+    List reducer for graph state. Unlike operator.add it copies only on the first
+    merge and appends in place afterwards, so repeated merges stay O(len(right)).
+    """
+    if not right:
+        return left if left is not None else []
+    if not left:
+        return list(right)
+    left.extend(right)
+    return left
@@ -2,26 +2,48 @@ import json
 import os
 import logging
 import re
-import boto3
+import functools
 from typing import Dict , Any , List
 
-from langchain_aws import ChatBedrock
-from langchain_aws import BedrockEmbeddings
-from langchain_community.vectorstores import OpenSearchVectorSearch
-from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage , SystemMessage
-from opensearchpy import AWSV4SignerAuth
-import requests
 
 from backend.src.graph.state import VideoAuditState , complianceIssue
+from backend.src.graph.compact_state import summarize_labels
 
-from backend.src.services.video_index import VideoIndexerServices
+from backend.src.services.video_index import get_video_indexer_service
+from backend.src.services.blob_store import BlobRef , load_text , release_text
+from backend.src.services.audit_cache import get_audit_cache , rule_id
+from backend.src.services.prescreen import prescreen_transcript
+from backend.src.services.rule_matcher import get_rule_matcher
+from backend.src.api.telemetry import traced , span , record_tokens
 
 logger = logging.getLogger("brand-compliance-rules")
 logging.basicConfig(level=logging.INFO)
 
+# AWS error codes / exception types worth another attempt; anything else recurs on retry
+TRANSIENT_ERROR_CODES = {
+    "Throttling", "ThrottlingException", "TooManyRequestsException", "ServiceUnavailable",
+    "ServiceUnavailableException", "InternalServerError", "InternalServerException",
+    "ProvisionedThroughputExceededException", "RequestLimitExceeded", "ModelNotReadyException",
+    "LimitExceededException", "SlowDown",
+}
+TRANSIENT_ERROR_TYPES = {"EndpointConnectionError", "ConnectTimeoutError", "ReadTimeoutError", "ConnectionClosedError", "ConnectionError", "TimeoutError"}
+
+
+def _is_transient(error: BaseException) -> bool:
+    """True for throttling, 5xx and connection errors from AWS/Bedrock (also when wrapped by langchain)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        code = (getattr(error, "response", None) or {}).get("Error", {}).get("Code")
+        if code in TRANSIENT_ERROR_CODES or type(error).__name__ in TRANSIENT_ERROR_TYPES:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
 # INDEXER
 
+@traced("node.index_video")
 def index_video_node( state: VideoAuditState) -> Dict[str , Any]:
     """
     download -> stores blob storage -> extract insights
@@ -31,26 +53,43 @@ def index_video_node( state: VideoAuditState) -> Dict[str , Any]:
 
     logger.info(f" processing video : {video_url}")
 
-    local_filename = "temp_audit_video.mp4"
+    # per-audit file: concurrent audits (worker threads) must not share one download path
+    local_filename = f"temp_audit_{video_id}.mp4"
     try:
-        vi_service = VideoIndexerServices()
+        vi_service = get_video_indexer_service()
         # download part
         if "youtube.com" in video_url or "youtu.be" in video_url:
-            local_path = vi_service.download_youtube_video(video_url , output_path=local_filename)
+            local_path , download_info = vi_service.download_youtube_video_with_info(video_url , output_path=local_filename)
 
         else:
             raise Exception("Please provide a valid youtube URL")
         # upload part
         vi_service.upload_to_s3(local_path, video_id)
 
-        # start Rekognition analysis
-        job_id = vi_service.start_video_analysis("orchestra-frankfurt", f"videos/{video_id}.mp4")
+        keyframe_mode = os.getenv("VISUAL_PIPELINE", "video").lower() == "keyframes"
+
+        # start Rekognition analysis (full video job unless keyframe sampling is on)
+        job_id = None
+        if not keyframe_mode:
+            job_id = vi_service.start_video_analysis("orchestra-frankfurt", f"videos/{video_id}.mp4")
         
         # start Transcribe analysis
         transcribe_job_name = f"audit_{video_id}"
         vi_service.start_transcription_job("orchestra-frankfurt", f"videos/{video_id}.mp4", transcribe_job_name)
 
-        logger.info(f"Analysis started. Rekognition ID: {job_id}, Transcribe ID: {transcribe_job_name}")
+        logger.info(f"Analysis started. Rekognition ID: {job_id or 'keyframes'}, Transcribe ID: {transcribe_job_name}")
+
+        raw_insights = {}
+        if keyframe_mode:
+            # runs locally while Transcribe works, so it must happen before the file is removed
+            try:
+                raw_insights = vi_service.analyze_keyframes(local_path)
+            except Exception as e:
+                # missing 'visual' extra, a container OpenCV can't read (cv2.error), throttled or denied
+                # detect_labels/detect_text: Transcribe is already paid for, so fall back to the
+                # full-video Rekognition job rather than failing the audit
+                logger.warning(f"Keyframe sampling unavailable ({e}); falling back to video label detection.")
+                job_id = vi_service.start_video_analysis("orchestra-frankfurt", f"videos/{video_id}.mp4")
 
         # cleaning
         if os.path.exists(local_path):
@@ -58,13 +97,14 @@ def index_video_node( state: VideoAuditState) -> Dict[str , Any]:
 
         # Polling for results (simplified for simulation)
         import time
-        max_retries = 30
+        max_retries = int(os.getenv("AUDIT_POLL_MAX_RETRIES", "30"))
+        poll_interval = float(os.getenv("AUDIT_POLL_INTERVAL_SECONDS", "10"))
         transcript_text = ""
-        raw_insights = {}
+        transcript_items = []
 
         print("Polling for analysis results (this may take a minute)...")
         for i in range(max_retries):
-            time.sleep(10) # wait 10 seconds between polls
+            time.sleep(poll_interval) # wait between polls (10 seconds by default)
             
             # Check Rekognition
             if not raw_insights or raw_insights.get("JobStatus") != "SUCCEEDED":
@@ -72,7 +112,7 @@ def index_video_node( state: VideoAuditState) -> Dict[str , Any]:
             
             # Check Transcribe
             if not transcript_text:
-                transcript_text = vi_service.get_transcription_text(transcribe_job_name)
+                transcript_text , transcript_items = vi_service.get_transcription_result(transcribe_job_name)
             
             if (raw_insights.get("JobStatus") == "SUCCEEDED") and transcript_text:
                 print("Analysis completed successfully.")
@@ -81,7 +121,8 @@ def index_video_node( state: VideoAuditState) -> Dict[str , Any]:
             print(f"Still processing... (Attempt {i+1}/{max_retries})")
 
         # extract
-        clean_data = vi_service.extract_data(raw_insights, transcript_text)
+        clean_data = vi_service.extract_data(raw_insights, transcript_text, transcript_items, video_id)
+        clean_data["video_duration_s"] = download_info.get("duration")
         logger.info(f"-----[NODE : Indexer] Extraction Completed-------")
         return clean_data
 
@@ -90,6 +131,7 @@ def index_video_node( state: VideoAuditState) -> Dict[str , Any]:
         
         return {
             "error": [str(e)],
+            "retryable": _is_transient(e),
             "final_status": "failed",
             "final_message": f"Failed to index video: {str(e)}",
             "transcript": "",
@@ -102,37 +144,110 @@ def index_video_node( state: VideoAuditState) -> Dict[str , Any]:
 
 # Compliance 
 
-def auto_content_node( state: VideoAuditState) -> Dict[str , Any]:
+AUDITOR_INSTRUCTIONS = """
+    You are a Brand Compliance Auditor. Your job is to analyze video data based on the provided regulation rules.
+    
+    Return your response in JSON format:
+    {
+        "compliance_result": [
+            {
+                "category": "string",
+                "description": "string",
+                "severity": "Warning/Critical/Info",
+                "suggestion": "string"
+            }
+        ],
+        "final_status": "success/warning/failed",
+        "final_report": "Summary"
+    }
+
+    DETERMINISTIC_FINDINGS lists issues already found by exact rule checks. Take them
+    into account, but do not repeat them in compliance_result.
+    RULE_HINTS lists possible issues flagged by keyword triggers only. Report one in
+    compliance_result only if the video content confirms it.
+    """
+
+
+def _token_usage(response) -> Dict[str, int]:
+    """Normalizes token counts (including prompt-cache reads/writes) from a Bedrock chat response."""
+    usage_metadata = getattr(response, "usage_metadata", None) or {}
+    details = usage_metadata.get("input_token_details", {}) or {}
+    raw_usage = (getattr(response, "response_metadata", None) or {}).get("usage", {}) or {}
+    return {
+        "input_tokens": usage_metadata.get("input_tokens") or raw_usage.get("input_tokens") or raw_usage.get("prompt_tokens") or 0,
+        "output_tokens": usage_metadata.get("output_tokens") or raw_usage.get("output_tokens") or raw_usage.get("completion_tokens") or 0,
+        "cache_read_tokens": details.get("cache_read") or raw_usage.get("cache_read_input_tokens") or 0,
+        "cache_write_tokens": details.get("cache_creation") or raw_usage.get("cache_creation_input_tokens") or 0,
+    }
+
+
+# Anthropic models on Bedrock that accept cache_control checkpoints (Claude 3 Sonnet/Haiku reject them;
+# other providers get the system prompt as a plain string, see _system_content)
+PROMPT_CACHE_MODELS = ("claude-3-5-haiku", "claude-3-7-sonnet", "claude-sonnet-4", "claude-opus-4", "claude-haiku-4")
+
+
+def _add_cache_checkpoint(system_blocks: List[Dict[str , Any]]) -> bool:
+    """
+    Marks the longest system-prompt prefix that Bedrock can cache. Only for
+    allowlisted models, and only once the prefix reaches the checkpoint minimum
+    (~4 characters per token). Returns whether a checkpoint was added.
     """
-    RAG
+    if os.getenv("BEDROCK_PROMPT_CACHING", "false").lower() not in ("1", "true", "yes"):
+        return False
+    model = (os.getenv("AWS_OPENAI_MODEL") or "").lower()
+    if not any(name in model for name in PROMPT_CACHE_MODELS):
+        return False
+    min_chars = 4 * int(os.getenv("BEDROCK_PROMPT_CACHE_MIN_TOKENS", "1024"))
+    prefix_chars = 0
+    checkpoint = None
+    for block in system_blocks:
+        prefix_chars += len(block["text"])
+        if prefix_chars >= min_chars:
+            checkpoint = block
+            break
+    if checkpoint is None:
+        return False
+    checkpoint["cache_control"] = {"type": "ephemeral"}
+    return True
+
+
+def _system_content(system_blocks: List[Dict[str , Any]]):
     """
+    Content blocks only when a checkpoint was added; otherwise one plain string,
+    since the non-Anthropic Bedrock adapters would render a block list as its repr.
+    """
+    if _add_cache_checkpoint(system_blocks):
+        return system_blocks
+    return "\n\n".join(block["text"] for block in system_blocks)
 
-    logger.info("----[NODE: Auditor] querying the knowledges based and LLM---")
 
-    transcript = state.get("transcript")
-    if not transcript:
-        logger.warning("No transcript available ")
-        return {
-            "error": ["No transcript available for analysis"],
-            "final_status": "failed",
-            "final_message": "Failed to index video",
-            "transcript": "",
-            "ocr_text": [],
-            "video_metadata": [],
-            "compliance_result": []
-        }
+def _merge_findings(result: Dict[str , Any] , findings: List[Dict[str , Any]]) -> Dict[str , Any]:
+    """Prepends the deterministic rule findings to an LLM (or cached) result."""
+    if not findings:
+        return result
+    merged = dict(result)
+    merged["compliance_result"] = findings + list(result.get("compliance_result" , []))
+    if merged.get("final_status" , "success") == "success":
+        merged["final_status"] = "warning"
+    return merged
 
-    # initialising clients 
+
+def _aws_credentials():
     access_key = (os.getenv("AWS_STORAGE_CONNECTION_STRING") or "").strip().strip('"').strip("'")
     secret_key = (os.getenv("AWS_OPEN_AI_KEY") or "").strip().strip('"').strip("'")
     region = os.getenv("REGION", "eu-central-1")
+    return access_key , secret_key , region
 
-    session = boto3.Session(
-        aws_access_key_id=access_key,
-        aws_secret_access_key=secret_key,
-        region_name=region
-    )
 
+@functools.lru_cache(maxsize=1)
+def get_auditor_clients() -> Dict[str , Any]:
+    """
+    Bedrock chat and embedding clients. langchain_aws is imported here rather
+    than at module level so importing the graph stays cheap on serverless.
+    """
+    from langchain_aws import ChatBedrock , BedrockEmbeddings
+
+    access_key , secret_key , region = _aws_credentials()
     llm = ChatBedrock(
         model_id=os.getenv("AWS_OPENAI_MODEL"),
         model_kwargs={"temperature": 0.0},
@@ -146,28 +261,107 @@ def auto_content_node( state: VideoAuditState) -> Dict[str , Any]:
         aws_access_key_id=access_key,
         aws_secret_access_key=secret_key
     )
+    return {"llm": llm , "embeddings": embeddings}
 
-    # ---- Vector Store (OpenSearch) ----
-    credentials = session.get_credentials()
-    auth = AWSV4SignerAuth(credentials, region)
 
-    docs = []
+@functools.lru_cache(maxsize=1)
+def get_vector_store():
+    """OpenSearch vector store. Failures are not cached, so the next audit retries the connection."""
+    from langchain_community.vectorstores import OpenSearchVectorSearch
+    from opensearchpy import AWSV4SignerAuth , RequestsHttpConnection
+    import boto3
+
+    access_key , secret_key , region = _aws_credentials()
+    session = boto3.Session(
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_key,
+        region_name=region
+    )
+    auth = AWSV4SignerAuth(session.get_credentials(), region)
+
+    logger.info(f"Connecting to OpenSearch at {os.getenv('AWS_SEARCH_ENDPOINT')}...")
+    return OpenSearchVectorSearch(
+        opensearch_url=os.getenv("AWS_SEARCH_ENDPOINT"),
+        index_name=os.getenv("AWS_SEARCH_INDEX_NAME"),
+        embedding_function=get_auditor_clients()["embeddings"],
+        http_auth=auth,
+        use_ssl=True,
+        verify_certs=True,
+        connection_class=RequestsHttpConnection
+    )
+
+
+def prewarm():
+    """Imports the heavy SDKs and builds every client up front (used by the API lifespan hook)."""
+    get_auditor_clients()
     try:
-        logger.info(f"Connecting to OpenSearch at {os.getenv('AWS_SEARCH_ENDPOINT')}...")
-        vector_store = OpenSearchVectorSearch(
-            opensearch_url=os.getenv("AWS_SEARCH_ENDPOINT"),
-            index_name=os.getenv("AWS_SEARCH_INDEX_NAME"),
-            embedding_function=embeddings,
-            http_auth=auth,
-            use_ssl=True,
-            verify_certs=True,
-            connection_class=requests.Session
+        get_vector_store()
+    except Exception as e:
+        logger.warning(f"OpenSearch pre-warm failed: {e}")
+    get_video_indexer_service()
+    import yt_dlp  # noqa: F401 - first download would otherwise pay for it
+
+
+@traced("node.auto_content")
+def auto_content_node( state: VideoAuditState) -> Dict[str , Any]:
+    """
+    RAG. Last reader of the transcript, so an offloaded one is deleted here
+    whatever the outcome (direct graph callers get no leaked blobs either).
+    """
+    transcript_ref = state.get("transcript")
+    try:
+        result = _audit_content(state)
+    finally:
+        release_text(transcript_ref)
+    if isinstance(transcript_ref, BlobRef) and "transcript" not in result:
+        result = {**result, "transcript": None}
+    return result
+
+
+def _audit_content( state: VideoAuditState) -> Dict[str , Any]:
+    logger.info("----[NODE: Auditor] querying the knowledges based and LLM---")
+
+    transcript = load_text(state.get("transcript"))
+    if not transcript:
+        logger.warning("No transcript available ")
+        return {
+            "error": ["No transcript available for analysis"],
+            "final_status": "failed",
+            "final_message": "Failed to index video",
+            "transcript": "",
+            "ocr_text": [],
+            "video_metadata": [],
+            "compliance_result": []
+        }
+
+    # exact rule checks: one pass over transcript + OCR, no LLM call
+    with span("audit.rule_matcher") as current:
+        findings = get_rule_matcher().scan(
+            transcript,
+            state.get("ocr_text" , []),
+            state.get("transcript_segments"),
+            {"duration_s": state.get("video_duration_s"), "ad_format": state.get("ad_format")},
         )
+        current.set_attribute("findings", len(findings))
+    # trigger-only hits are hints for the model to confirm, never reported on their own
+    hints = [f for f in findings if f.get("hint")]
+    findings = [f for f in findings if not f.get("hint")]
+    if findings or hints:
+        logger.info(f"Rule index matched {len(findings)} deterministic issue(s) and {len(hints)} hint(s).")
+
+    # clients are built once per process (see get_auditor_clients / prewarm)
+    llm = get_auditor_clients()["llm"]
+
+    docs = []
+    try:
+        vector_store = get_vector_store()
         
         # rag retrieval
         ocr_text = state.get("ocr_text" , [])
         query_text = f"{transcript} {' '.join(ocr_text)}"
-        docs = vector_store.similarity_search(query_text, k=3, timeout=10)
+        with span("opensearch.retrieval", k=3) as current:
+            docs = vector_store.similarity_search(query_text, k=3, timeout=10)
+            current.set_attribute("documents", len(docs))
         logger.info(f"Successfully retrieved {len(docs)} documents.")
     except Exception as e:
         logger.warning(f"Knowledge base search failed: {e}. Falling back to internal audit model.")
@@ -175,53 +369,85 @@ def auto_content_node( state: VideoAuditState) -> Dict[str , Any]:
 
     regulation_rules = "\n\n".join([doc.page_content for doc in docs]) if docs else "No specific regulatory context found. Audit against general brand integrity."
 
-    system_prompt = f"""
-    You are a Brand Compliance Auditor. Your job is to analyze video data based on the provided regulation rules.
-    Rules context: {regulation_rules}
-    
-    Return your response in JSON format:
-    {{
-        "compliance_result": [
-            {{
-                "category": "string",
-                "description": "string",
-                "severity": "Warning/Critical/Info",
-                "suggestion": "string"
-            }}
-        ],
-        "final_status": "success/warning/failed",
-        "final_report": "Summary"
-    }}
-    """
+    # response cache: keyed by retrieved rules + normalized video content
+    cache = get_audit_cache()
+    if cache is not None:
+        # cascade verdicts are made on transcript excerpts, so they get their own buckets
+        audit_mode = os.getenv("AUDIT_MODE", "single").lower()
+        rules_key = cache.rules_key([rule_id(doc) for doc in docs] + [f"mode:{audit_mode}"])
+        digest = cache.content_digest(transcript, state.get("video_metadata", []), state.get("ocr_text", []))
+        cached = cache.get(rules_key, digest)
+        if cached is not None:
+            logger.info("Audit response served from cache.")
+            return _merge_findings(dict(cached), findings)
+
+    # two-tier cascade: only windows the cheap pre-screen flags go to the full model
+    audit_transcript = transcript
+    if os.getenv("AUDIT_MODE", "single").lower() == "cascade":
+        with span("audit.prescreen") as current:
+            screen = prescreen_transcript(transcript, regulation_rules, state.get("ocr_text", []))
+            current.set_attribute("suspicious_windows", len(screen["suspicious"]))
+        logger.info(f"Pre-screen flagged {len(screen['suspicious'])}/{len(screen['windows'])} windows (threshold {screen['threshold']}).")
+        # a pending rule hint needs the full model to confirm or dismiss it
+        if not screen["escalate"] and not hints:
+            result = {
+                "compliance_result": [],
+                "final_status": "success",
+                "final_report": "Pre-screen found no suspicious content; full audit skipped.",
+            }
+            # not cached: a skipped audit must never be served as a full-model verdict
+            return _merge_findings(result, findings)
+        if screen["escalate"]:
+            audit_transcript = " [...] ".join(w["text"] for w in screen["suspicious"] if w.get("source") != "ocr")
+
+    # static instructions first, rules second: the whole system prompt is a stable prefix across audits
+    system_blocks = [
+        {"type": "text", "text": AUDITOR_INSTRUCTIONS},
+        {"type": "text", "text": f"Rules context: {regulation_rules}"},
+    ]
+
+    # distinct labels with first/last sighting, not every detection: long videos have tens of thousands
+    video_labels = summarize_labels(state.get("video_metadata") or [], int(os.getenv("AUDIT_PROMPT_MAX_LABELS", "100")))
 
     user_message = f"""
-    VIDEO_METADATA : {state.get("video_metadata")}
-    TRANSCRIPT : {state.get("transcript")}
+    VIDEO_METADATA : {json.dumps(video_labels)}
+    TRANSCRIPT : {audit_transcript}
     OCR_TEXT : {state.get("ocr_text")}
+    DETERMINISTIC_FINDINGS : {json.dumps([{k: f[k] for k in ("description", "timestamp")} for f in findings]) if findings else "none"}
+    RULE_HINTS : {json.dumps([{k: f[k] for k in ("description", "timestamp")} for f in hints]) if hints else "none"}
     """
     
     try:
-        response = llm.invoke(
-            [SystemMessage(content=system_prompt) , HumanMessage(content=user_message)]
-        )
+        with span("bedrock.invoke", model=os.getenv("AWS_OPENAI_MODEL")) as current:
+            response = llm.invoke(
+                [SystemMessage(content=_system_content(system_blocks)) , HumanMessage(content=user_message)]
+            )
+            usage = _token_usage(response)
+            record_tokens(current, usage, os.getenv("AWS_OPENAI_MODEL"))
         response_content = response.content
         
         if "```" in response_content:
             response_content = re.search(r"```json(.*?)```" , response_content , re.DOTALL).group(1).strip()
         
         data = json.loads(response_content)
-        return {
+        result = {
             "compliance_result": data.get("compliance_result" , []),
             "final_status": data.get("final_status" , "success"),
             "final_report": data.get("final_report" , "Audit completed successfully."),
         }
+
+        if cache is not None:
+            cache.record_prompt_cache(usage["cache_read_tokens"], usage["cache_write_tokens"])
+            cache.put(rules_key, digest, result, usage)
+        return _merge_findings(result, findings)
     except Exception as e:
         logger.error(f"Error in auditor LLM phase: {str(e)}")
         return {
             "error": [str(e)],
+            "retryable": _is_transient(e),
             "final_status": "failed",
             "final_report": f"Audit error: {str(e)}",
-            "compliance_result": []
+            "compliance_result": findings
         }
 
 
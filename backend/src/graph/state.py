@@ -1,6 +1,7 @@
-import operator
+from typing import TypedDict, Annotated , Type , List , Dict , Any , Optional , Union
 
-from typing import TypedDict, Annotated , Type , List , Dict , Any , Optional
+from backend.src.graph.compact_state import LabelStore , SegmentStore , extend_in_place
+from backend.src.services.blob_store import BlobRef
 
 # schema for the compliance result  
 class complianceIssue(TypedDict):
@@ -20,13 +21,16 @@ class VideoAuditState(TypedDict):
     
     # ingestion and extraction
     local_file_path: Optional[str]
-    video_metadata: List[Dict[str, Any]]
-    transcript: Optional[str]
+    video_metadata: Union[LabelStore, List[Dict[str, Any]]]
+    transcript: Optional[Union[str, BlobRef]]   # long transcripts are stored by reference
+    transcript_segments: Optional[SegmentStore]
     ocr_text: List[str]
+    video_duration_s: Optional[float]
+    ad_format: Optional[str]   # e.g. "bumper"; enables the format-specific duration rules
 
 
     # analysis
-    compliance_result: Annotated[List[complianceIssue], operator.add]
+    compliance_result: Annotated[List[complianceIssue], extend_in_place]
 
 
     # final  
@@ -34,6 +38,7 @@ class VideoAuditState(TypedDict):
     final_message: str
 
     # api timeout , system level errors
-    error: Annotated[List[str] , operator.add]
+    error: Annotated[List[str] , extend_in_place]
+    retryable: Optional[bool]   # set by a node when the failure was transient (throttling, 5xx, network)
     
     
\ No newline at end of file
@@ -1,7 +1,10 @@
+import uuid
+
 from langgraph.graph import StateGraph , END
 
 from backend.src.graph.state import VideoAuditState
 from backend.src.graph.nodes import index_video_node , auto_content_node
+from backend.src.services.blob_store import release_text
 
 
 
@@ -26,3 +29,36 @@ def create_graph():
 
 # expose the runable video_audit_graph 
 video_audit_graph = create_graph()
+
+
+def run_video_audit(video_url: str , video_id: str = None , ad_format: str = None) -> dict:
+    """
+    Runs one audit end-to-end and shapes the final state into the API response.
+    Shared by the in-process API path and the queue workers.
+    """
+    input_data = {
+        "video_url": video_url,
+        "video_id": video_id or str(uuid.uuid4())[:8],
+        "ad_format": ad_format,
+        "compliance_result": [],
+        "error": []
+    }
+
+    # stream the state so a run that raises part-way still leaves the last state to clean up
+    result = input_data
+    try:
+        for result in video_audit_graph.stream(input_data, stream_mode="values"):
+            pass
+    finally:
+        # the auditor node normally releases an offloaded transcript; this covers runs that never reached it
+        release_text(result.get("transcript"))
+
+    return {
+        "success": result.get("final_status") == "success",
+        "video_id": result.get("video_id"),
+        "status": result.get("final_status"),
+        "report": result.get("final_report", "No report generated"),
+        "issues": result.get("compliance_result", []),
+        "errors": result.get("error", []),
+        "retryable": bool(result.get("retryable"))
+    }
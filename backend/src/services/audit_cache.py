@@ -0,0 +1,183 @@
+'''
+Response cache for auditor LLM responses (exact, optionally semantic).
+'''
+
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger("audit-cache")
+
+_TOKEN_RE = re.compile(r"[a-z0-9#@']+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercases text and collapses punctuation/whitespace so trivial edits hash the same."""
+    return " ".join(_TOKEN_RE.findall((text or "").lower()))
+
+
+def rule_id(doc) -> str:
+    """Stable identifier for a retrieved rule chunk (OpenSearch id if present, else content hash)."""
+    metadata = getattr(doc, "metadata", None) or {}
+    for key in ("id", "_id", "rule_id"):
+        if metadata.get(key):
+            return str(metadata[key])
+    content = getattr(doc, "page_content", "") or ""
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class AuditResponseCache:
+    """
+    In-process cache of auditor responses.
+
+    Entries are bucketed by a hash of the retrieved rule IDs. Inside a bucket only
+    an exact digest of the normalized transcript/labels matches, unless `semantic`
+    is on: then the closest entry by token-set Jaccard similarity above
+    `similarity_threshold` is served too, provided the two token sets differ by at
+    most `max_new_tokens` tokens either way (one added claim can change a verdict,
+    so similarity alone is not enough).
+    """
+    def __init__(self, ttl_seconds: float = 3600, similarity_threshold: float = 0.92, max_entries: int = 512,
+                 semantic: bool = False, max_new_tokens: int = 0):
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.max_new_tokens = max(0, max_new_tokens)
+        self._buckets: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "input_tokens_saved": 0,
+            "output_tokens_saved": 0,
+            "prompt_cache_read_tokens": 0,
+            "prompt_cache_write_tokens": 0,
+        }
+
+    @staticmethod
+    def rules_key(rule_ids: List[str]) -> str:
+        return hashlib.sha256("|".join(sorted(rule_ids)).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def content_digest(transcript: str, labels: List[Any], ocr_text: List[str]) -> Dict[str, Any]:
+        """Normalized digest of the per-video input: exact hash plus the token set used for similarity."""
+        raw_names = labels.names() if hasattr(labels, "names") else [l.get("name") if isinstance(l, dict) else l for l in (labels or [])]
+        label_names = sorted({normalize_text(str(name)) for name in raw_names})
+        text = normalize_text(f"{transcript} {' '.join(ocr_text or [])}")
+        exact = hashlib.sha256(f"{text}\n{'|'.join(label_names)}".encode("utf-8")).hexdigest()
+        tokens = frozenset(text.split()) | frozenset(f"label:{n}" for n in label_names if n)
+        return {"exact": exact, "tokens": tokens}
+
+    @staticmethod
+    def _similarity(a: frozenset, b: frozenset) -> float:
+        if not a and not b:
+            return 1.0
+        return len(a & b) / len(a | b)
+
+    def get(self, rules_key: str, digest: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(rules_key, {})
+            self._evict_expired(bucket, now)
+
+            entry = bucket.get(digest["exact"])
+            semantic = False
+            if entry is None and self.semantic:
+                best, best_score = None, 0.0
+                for candidate in bucket.values():
+                    if (len(digest["tokens"] - candidate["tokens"]) > self.max_new_tokens
+                            or len(candidate["tokens"] - digest["tokens"]) > self.max_new_tokens):
+                        continue
+                    score = self._similarity(digest["tokens"], candidate["tokens"])
+                    if score > best_score:
+                        best, best_score = candidate, score
+                if best is not None and best_score >= self.similarity_threshold:
+                    entry, semantic = best, True
+
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._stats["hits"] += 1
+            if semantic:
+                self._stats["semantic_hits"] += 1
+            self._stats["input_tokens_saved"] += entry["usage"].get("input_tokens", 0)
+            self._stats["output_tokens_saved"] += entry["usage"].get("output_tokens", 0)
+            return entry["response"]
+
+    def put(self, rules_key: str, digest: Dict[str, Any], response: Dict[str, Any], usage: Optional[Dict[str, int]] = None):
+        with self._lock:
+            if self._size >= self.max_entries:
+                self._evict_oldest()
+            bucket = self._buckets.setdefault(rules_key, {})
+            if digest["exact"] not in bucket:
+                self._size += 1
+            bucket[digest["exact"]] = {
+                "tokens": digest["tokens"],
+                "response": response,
+                "usage": usage or {},
+                "expires_at": time.monotonic() + self.ttl_seconds,
+            }
+
+    def record_prompt_cache(self, read_tokens: int = 0, write_tokens: int = 0):
+        """Tracks Bedrock prompt-cache usage reported on LLM responses."""
+        with self._lock:
+            self._stats["prompt_cache_read_tokens"] += read_tokens or 0
+            self._stats["prompt_cache_write_tokens"] += write_tokens or 0
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["entries"] = self._size
+            stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+            return stats
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._size = 0
+
+    def _evict_expired(self, bucket: Dict[str, Dict[str, Any]], now: float):
+        expired = [key for key, entry in bucket.items() if entry["expires_at"] <= now]
+        for key in expired:
+            del bucket[key]
+        self._size -= len(expired)
+
+    def _evict_oldest(self):
+        oldest_bucket, oldest_key, oldest_expiry = None, None, None
+        for bucket_key, bucket in self._buckets.items():
+            for key, entry in bucket.items():
+                if oldest_expiry is None or entry["expires_at"] < oldest_expiry:
+                    oldest_bucket, oldest_key, oldest_expiry = bucket_key, key, entry["expires_at"]
+        if oldest_bucket is not None:
+            del self._buckets[oldest_bucket][oldest_key]
+            self._size -= 1
+
+
+_cache: Optional[AuditResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_audit_cache() -> Optional[AuditResponseCache]:
+    """Returns the process-wide cache, or None when AUDIT_CACHE_ENABLED is off."""
+    global _cache
+    if os.getenv("AUDIT_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = AuditResponseCache(
+                ttl_seconds=float(os.getenv("AUDIT_CACHE_TTL_SECONDS", "3600")),
+                similarity_threshold=float(os.getenv("AUDIT_CACHE_SIMILARITY", "0.92")),
+                max_entries=int(os.getenv("AUDIT_CACHE_MAX_ENTRIES", "512")),
+                semantic=os.getenv("AUDIT_CACHE_SEMANTIC", "false").lower() in ("1", "true", "yes"),
+                max_new_tokens=int(os.getenv("AUDIT_CACHE_MAX_NEW_TOKENS", "0")),
+            )
+        return _cache
@@ -0,0 +1,99 @@
+'''
+By-reference storage for large text blobs (transcripts) carried in audit state.
+'''
+
+import os
+import hashlib
+import logging
+import tempfile
+from typing import Optional, Union
+
+logger = logging.getLogger("blob-store")
+
+
+class BlobRef:
+    """Pointer to text stored on local disk (`file://`) or S3 (`s3://`)."""
+    __slots__ = ("uri", "length")
+
+    def __init__(self, uri: str, length: int):
+        self.uri = uri
+        self.length = length
+
+    def read(self) -> str:
+        return BlobStore.get(self)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __bool__(self) -> bool:
+        return self.length > 0
+
+    def __repr__(self) -> str:
+        return f"BlobRef({self.uri!r}, {self.length} chars)"
+
+
+class BlobStore:
+    """
+    Offloads text above AUDIT_BLOB_INLINE_LIMIT characters. AUDIT_BLOB_STORE picks
+    the backend: "disk" (default, AUDIT_BLOB_DIR) or "s3" (the audit bucket).
+    """
+
+    @staticmethod
+    def put(text: str, key_hint: str = "") -> Union[str, BlobRef]:
+        """Returns `text` unchanged when small, otherwise a BlobRef to the stored copy."""
+        if len(text or "") <= int(os.getenv("AUDIT_BLOB_INLINE_LIMIT", "32768")):
+            return text
+
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        name = f"{key_hint or 'blob'}-{digest}.txt"
+        if os.getenv("AUDIT_BLOB_STORE", "disk").lower() == "s3":
+            from backend.src.services.video_index import get_video_indexer_service
+            service = get_video_indexer_service()
+            key = f"blobs/{name}"
+            service.s3.put_object(Bucket=service.default_bucket, Key=key, Body=text.encode("utf-8"))
+            uri = f"s3://{service.default_bucket}/{key}"
+        else:
+            directory = os.getenv("AUDIT_BLOB_DIR") or os.path.join(tempfile.gettempdir(), "botocop-blobs")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            uri = f"file://{path}"
+        return BlobRef(uri, len(text))
+
+    @staticmethod
+    def get(ref: BlobRef) -> str:
+        if ref.uri.startswith("s3://"):
+            from backend.src.services.video_index import get_video_indexer_service
+            bucket, key = ref.uri[len("s3://"):].split("/", 1)
+            body = get_video_indexer_service().s3.get_object(Bucket=bucket, Key=key)["Body"].read()
+            return body.decode("utf-8")
+        with open(ref.uri[len("file://"):], encoding="utf-8") as f:
+            return f.read()
+
+    @staticmethod
+    def delete(ref: BlobRef):
+        try:
+            if ref.uri.startswith("s3://"):
+                from backend.src.services.video_index import get_video_indexer_service
+                bucket, key = ref.uri[len("s3://"):].split("/", 1)
+                get_video_indexer_service().s3.delete_object(Bucket=bucket, Key=key)
+            else:
+                os.remove(ref.uri[len("file://"):])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Failed to delete blob {ref.uri}: {e}")
+
+
+def load_text(value: Optional[Union[str, BlobRef]]) -> str:
+    """Resolves a state field that may hold inline text or a BlobRef."""
+    if isinstance(value, BlobRef):
+        return value.read()
+    return value or ""
+
+
+def release_text(value: Optional[Union[str, BlobRef]]):
+    """Deletes the stored copy behind a state field holding a BlobRef; inline text needs nothing."""
+    if isinstance(value, BlobRef):
+        BlobStore.delete(value)
@@ -0,0 +1,202 @@
+'''
+Redis-backed work queue for audit jobs shared by the API and worker processes.
+
+Keys (all under `prefix`):
+    <prefix>:pending        list of job ids waiting to run (LPUSH in, RPOP out)
+    <prefix>:inflight       zset of claimed job ids scored by visibility deadline
+    <prefix>:dead           list of job ids that exhausted their retries
+    <prefix>:job:<id>       hash with payload, status, attempts, result, error
+    <prefix>:done:<id>      list signalled once the job finishes (for waiters)
+'''
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+
+import redis
+import redis.asyncio
+
+logger = logging.getLogger("audit-queue")
+
+# RPOP + ZADD + HINCRBY in one step so a crash can never lose a claimed job
+_CLAIM_SCRIPT = """
+local job_id = redis.call('RPOP', KEYS[1])
+if not job_id then return nil end
+local now = redis.call('TIME')
+local deadline = tonumber(now[1]) + tonumber(ARGV[1])
+redis.call('ZADD', KEYS[2], deadline, job_id)
+local job_key = ARGV[2] .. job_id
+redis.call('HINCRBY', job_key, 'attempts', 1)
+redis.call('HSET', job_key, 'status', 'running', 'worker', ARGV[3], 'started_at', now[1] .. '.' .. now[2])
+return job_id
+"""
+
+# moves every job whose visibility deadline passed back to pending, or to dead once out of retries
+_REAP_SCRIPT = """
+local now = redis.call('TIME')
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', tonumber(now[1]))
+local requeued = 0
+for _, job_id in ipairs(expired) do
+    redis.call('ZREM', KEYS[1], job_id)
+    local job_key = ARGV[1] .. job_id
+    local attempts = tonumber(redis.call('HGET', job_key, 'attempts') or '0')
+    if attempts >= tonumber(ARGV[2]) then
+        redis.call('HSET', job_key, 'status', 'dead', 'error', 'visibility timeout exceeded')
+        redis.call('LPUSH', KEYS[3], job_id)
+        redis.call('LPUSH', ARGV[3] .. job_id, 'dead')
+        redis.call('EXPIRE', ARGV[3] .. job_id, tonumber(ARGV[4]))
+    else
+        redis.call('HSET', job_key, 'status', 'queued')
+        redis.call('LPUSH', KEYS[2], job_id)
+        requeued = requeued + 1
+    end
+end
+return requeued
+"""
+
+
+class AuditJobQueue:
+    """
+    At-least-once job queue with visibility timeouts, retries and a dead-letter list.
+    """
+    def __init__(self, client: Optional[redis.Redis] = None, url: Optional[str] = None, prefix: str = "botocop:audit",
+                 visibility_timeout: int = 900, max_retries: int = 3, result_ttl: int = 86400):
+        self.url = None if client is not None else (url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        self.redis = client or redis.Redis.from_url(self.url, decode_responses=True)
+        self._async_redis = None
+        self.prefix = prefix
+        self.visibility_timeout = visibility_timeout
+        self.max_retries = max_retries
+        self.result_ttl = result_ttl
+
+        self.pending_key = f"{prefix}:pending"
+        self.inflight_key = f"{prefix}:inflight"
+        self.dead_key = f"{prefix}:dead"
+        self.job_prefix = f"{prefix}:job:"
+        self.done_prefix = f"{prefix}:done:"
+
+        self._claim = self.redis.register_script(_CLAIM_SCRIPT)
+        self._reap = self.redis.register_script(_REAP_SCRIPT)
+
+    @classmethod
+    def from_env(cls) -> "AuditJobQueue":
+        return cls(
+            url=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            prefix=os.getenv("AUDIT_QUEUE_PREFIX", "botocop:audit"),
+            visibility_timeout=int(os.getenv("AUDIT_QUEUE_VISIBILITY_TIMEOUT", "900")),
+            max_retries=int(os.getenv("AUDIT_QUEUE_MAX_RETRIES", "3")),
+        )
+
+    def enqueue(self, payload: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        pipe = self.redis.pipeline()
+        pipe.hset(self.job_prefix + job_id, mapping={
+            "payload": json.dumps(payload),
+            "status": "queued",
+            "attempts": 0,
+            "enqueued_at": time.time(),
+        })
+        pipe.lpush(self.pending_key, job_id)
+        pipe.execute()
+        logger.info(f"Enqueued audit job {job_id}")
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Pops the next job and hides it from other workers for `visibility_timeout` seconds."""
+        job_id = self._claim(keys=[self.pending_key, self.inflight_key], args=[self.visibility_timeout, self.job_prefix, worker_id])
+        if not job_id:
+            return None
+        job = self.get(job_id)
+        job["id"] = job_id
+        return job
+
+    def heartbeat(self, job_id: str):
+        """Pushes the visibility deadline out for a job that is still running."""
+        server_now = self.redis.time()[0]
+        self.redis.zadd(self.inflight_key, {job_id: server_now + self.visibility_timeout}, xx=True)
+
+    def complete(self, job_id: str, result: Dict[str, Any]):
+        pipe = self.redis.pipeline()
+        pipe.zrem(self.inflight_key, job_id)
+        pipe.hset(self.job_prefix + job_id, mapping={"status": "done", "result": json.dumps(result), "finished_at": time.time()})
+        pipe.expire(self.job_prefix + job_id, self.result_ttl)
+        pipe.lpush(self.done_prefix + job_id, "done")
+        pipe.expire(self.done_prefix + job_id, self.result_ttl)
+        pipe.execute()
+
+    def fail(self, job_id: str, error: str, result: Optional[Dict[str, Any]] = None):
+        """
+        Retries the job, or dead-letters it once `max_retries` attempts have been used.
+        `result` (the last failed audit, if the pipeline produced one) is kept with a dead job.
+        """
+        attempts = int(self.redis.hget(self.job_prefix + job_id, "attempts") or 0)
+        pipe = self.redis.pipeline()
+        pipe.zrem(self.inflight_key, job_id)
+        if attempts >= self.max_retries:
+            logger.error(f"Audit job {job_id} dead-lettered after {attempts} attempts: {error}")
+            fields = {"status": "dead", "error": error}
+            if result is not None:
+                fields["result"] = json.dumps(result)
+            pipe.hset(self.job_prefix + job_id, mapping=fields)
+            pipe.lpush(self.dead_key, job_id)
+            pipe.lpush(self.done_prefix + job_id, "dead")
+            pipe.expire(self.done_prefix + job_id, self.result_ttl)
+        else:
+            logger.warning(f"Audit job {job_id} failed (attempt {attempts}/{self.max_retries}), retrying: {error}")
+            pipe.hset(self.job_prefix + job_id, mapping={"status": "queued", "error": error})
+            pipe.lpush(self.pending_key, job_id)
+        pipe.execute()
+
+    def requeue_expired(self) -> int:
+        """Recovers jobs whose worker died or stalled past the visibility timeout."""
+        return int(self._reap(
+            keys=[self.inflight_key, self.pending_key, self.dead_key],
+            args=[self.job_prefix, self.max_retries, self.done_prefix, self.result_ttl],
+        ) or 0)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        data = self.redis.hgetall(self.job_prefix + job_id)
+        if not data:
+            return None
+        job = {
+            "id": job_id,
+            "status": data.get("status"),
+            "attempts": int(data.get("attempts", 0)),
+            "enqueued_at": float(data.get("enqueued_at", 0)),
+        }
+        job["payload"] = json.loads(data["payload"]) if data.get("payload") else {}
+        if data.get("result"):
+            job["result"] = json.loads(data["result"])
+        if data.get("error"):
+            job["error"] = data["error"]
+        return job
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Blocks until the job finishes (done or dead) or `timeout` seconds pass."""
+        signalled = self.redis.blpop([self.done_prefix + job_id], timeout=max(1, int(timeout)))
+        if signalled is None:
+            return None
+        return self.get(job_id)
+
+    async def wait_async(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """`wait` on an asyncio connection, so API requests waiting on workers don't each hold a thread."""
+        if self.url is None:
+            return await asyncio.to_thread(self.wait, job_id, timeout)
+        if self._async_redis is None:
+            self._async_redis = redis.asyncio.Redis.from_url(self.url, decode_responses=True)
+        signalled = await self._async_redis.blpop([self.done_prefix + job_id], timeout=max(1, int(timeout)))
+        if signalled is None:
+            return None
+        return await asyncio.to_thread(self.get, job_id)
+
+    def stats(self) -> Dict[str, int]:
+        pipe = self.redis.pipeline()
+        pipe.llen(self.pending_key)
+        pipe.zcard(self.inflight_key)
+        pipe.llen(self.dead_key)
+        pending, inflight, dead = pipe.execute()
+        return {"pending": pending, "inflight": inflight, "dead": dead}
@@ -0,0 +1,179 @@
+'''
+Local keyframe sampling and image-level Rekognition analysis.
+
+Decodes the downloaded video at a low sampling rate, finds scene changes with
+vectorized frame differencing, drops near-duplicate frames and sends only the
+remaining keyframes to `detect_labels` / `detect_text`. Needs the optional
+`visual` extra (numpy, opencv-python-headless).
+'''
+
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+from backend.src.api.telemetry import span
+
+logger = logging.getLogger("video-keyframes")
+
+# grayscale thumbnail used for differencing and hashing
+_THUMB_SIZE = (64, 36)
+
+
+def _require_visual_deps():
+    try:
+        import numpy as np
+        import cv2
+    except ImportError as e:
+        raise ImportError("Keyframe sampling needs the 'visual' extra: uv sync --extra visual") from e
+    return np, cv2
+
+
+def _average_hash(thumbs, np):
+    """64-bit average hash per thumbnail, as an (N, 64) bool array."""
+    n = len(thumbs)
+    # crop the 64x36 thumbnails to 64x32 so they split into an exact 8x8 grid of 8x4 blocks
+    blocks = thumbs[:, :32, :].reshape(n, 8, 4, 8, 8).mean(axis=(2, 4))
+    return blocks.reshape(n, 64) > blocks.reshape(n, 64).mean(axis=1, keepdims=True)
+
+
+def sample_keyframes(video_path: str, sample_fps: float = 2.0, min_scene_diff: float = 12.0, max_gap_s: float = 30.0,
+                     dedupe_bits: int = 6, max_keyframes: int = 60) -> List[Dict[str, Any]]:
+    """
+    Returns representative keyframes as [{"timestamp_ms", "score", "image"}] where
+    `image` is JPEG bytes ready for Rekognition.
+
+    A sampled frame becomes a keyframe when its mean absolute difference to the
+    previous sample exceeds an adaptive threshold (at least `min_scene_diff`),
+    or when `max_gap_s` has passed without one. Keyframes whose average hash is
+    within `dedupe_bits` of an already kept frame are dropped, which collapses
+    talking heads and slideshows that revisit the same slide.
+    """
+    np, cv2 = _require_visual_deps()
+
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise IOError(f"Could not open video: {video_path}")
+
+    try:
+        native_fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        step = max(1, int(round(native_fps / sample_fps)))
+
+        # pass 1: decode only every `step`-th frame into small grayscale thumbnails
+        thumbs, timestamps = [], []
+        index = 0
+        with span("keyframes.decode", step=step) as current:
+            while capture.grab():
+                if index % step == 0:
+                    ok, frame = capture.retrieve()
+                    if not ok:
+                        break
+                    gray = cv2.cvtColor(cv2.resize(frame, _THUMB_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+                    thumbs.append(gray)
+                    timestamps.append(int(index * 1000 / native_fps))
+                index += 1
+            current.set_attribute("sampled_frames", len(thumbs))
+
+        if not thumbs:
+            return []
+
+        stack = np.stack(thumbs)
+        times = np.asarray(timestamps)
+        del thumbs
+
+        # scene change: mean |frame[i] - frame[i-1]|, vectorized over chunks of the stack to bound memory
+        diffs = np.empty(len(stack), dtype=np.float32)
+        diffs[0] = np.inf
+        for start in range(1, len(stack), 2048):
+            chunk = stack[start - 1:start + 2048].astype(np.int16)
+            diffs[start:start + len(chunk) - 1] = np.abs(np.diff(chunk, axis=0)).mean(axis=(1, 2))
+        finite = diffs[1:]
+        threshold = max(min_scene_diff, float(finite.mean() + 2 * finite.std())) if len(finite) else min_scene_diff
+        candidates = np.flatnonzero(diffs >= threshold)
+
+        # fill long static stretches so every `max_gap_s` window has a representative frame
+        selected, last_ms = [], None
+        candidate_set = set(candidates.tolist())
+        for i, ts in enumerate(times.tolist()):
+            if i in candidate_set or last_ms is None or ts - last_ms >= max_gap_s * 1000:
+                selected.append(i)
+                last_ms = ts
+
+        # near-duplicate removal by average-hash Hamming distance
+        hashes = _average_hash(stack[selected].astype(np.float32), np)
+        hash_of = dict(zip(selected, hashes))
+        kept: List[int] = []
+        for i in selected:
+            if kept and np.count_nonzero(np.stack([hash_of[k] for k in kept]) != hash_of[i], axis=1).min() <= dedupe_bits:
+                continue
+            kept.append(i)
+
+        if len(kept) > max_keyframes:
+            # keep the strongest scene changes, always including the opening frame
+            ranked = sorted(kept[1:], key=lambda i: diffs[i], reverse=True)[:max_keyframes - 1]
+            kept = sorted([kept[0]] + ranked)
+
+        # pass 2: seek back and encode the chosen frames at full resolution
+        keyframes = []
+        for i in kept:
+            capture.set(cv2.CAP_PROP_POS_MSEC, float(times[i]))
+            ok, frame = capture.read()
+            if not ok:
+                continue
+            height, width = frame.shape[:2]
+            if width > 1280:
+                frame = cv2.resize(frame, (1280, int(height * 1280 / width)), interpolation=cv2.INTER_AREA)
+            ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+            if ok:
+                keyframes.append({
+                    "timestamp_ms": int(times[i]),
+                    "score": float(diffs[i]) if np.isfinite(diffs[i]) else None,
+                    "image": encoded.tobytes(),
+                })
+
+        logger.info(f"Selected {len(keyframes)} keyframes from {len(stack)} sampled frames ({index} decoded).")
+        return keyframes
+    finally:
+        capture.release()
+
+
+def detect_keyframe_insights(rekognition, keyframes: List[Dict[str, Any]], max_workers: int = 8, batch_size: int = 16,
+                             min_confidence: float = 70.0, detect_text: bool = True) -> Dict[str, Any]:
+    """
+    Runs detect_labels (and detect_text) on every keyframe in parallel batches and
+    returns a response shaped like `get_label_detection`, plus `TextDetections`,
+    with every label carrying its keyframe timestamp.
+    """
+    def analyze(keyframe):
+        image = {"Bytes": keyframe["image"]}
+        labels = rekognition.detect_labels(Image=image, MinConfidence=min_confidence).get("Labels", [])
+        texts = rekognition.detect_text(Image=image).get("TextDetections", []) if detect_text else []
+        return keyframe["timestamp_ms"], labels, texts
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for start in range(0, len(keyframes), batch_size):
+            batch = keyframes[start:start + batch_size]
+            with span("rekognition.detect_images", images=len(batch)):
+                results.extend(executor.map(analyze, batch))
+
+    labels, text_detections = [], []
+    for timestamp_ms, frame_labels, frame_texts in results:
+        for label in frame_labels:
+            labels.append({"Timestamp": timestamp_ms, "Label": {"Name": label.get("Name"), "Confidence": label.get("Confidence")}})
+        for text in frame_texts:
+            if text.get("Type") == "LINE":
+                text_detections.append({"Timestamp": timestamp_ms, "DetectedText": text.get("DetectedText"), "Confidence": text.get("Confidence")})
+
+    return {"JobStatus": "SUCCEEDED", "Labels": labels, "TextDetections": text_detections, "KeyframeCount": len(keyframes)}
+
+
+def keyframe_settings() -> Dict[str, Any]:
+    """Sampling settings from the environment."""
+    return {
+        "sample_fps": float(os.getenv("KEYFRAME_SAMPLE_FPS", "2")),
+        "min_scene_diff": float(os.getenv("KEYFRAME_MIN_SCENE_DIFF", "12")),
+        "max_gap_s": float(os.getenv("KEYFRAME_MAX_GAP_SECONDS", "30")),
+        "dedupe_bits": int(os.getenv("KEYFRAME_DEDUPE_BITS", "6")),
+        "max_keyframes": int(os.getenv("KEYFRAME_MAX_FRAMES", "60")),
+    }
@@ -0,0 +1,139 @@
+'''
+Cheap pre-screen tier for the auditor cascade.
+'''
+
+import os
+import re
+import json
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger("audit-prescreen")
+
+# Terms that make a transcript window worth a full audit regardless of the retrieved rules
+BASE_RISK_TERMS = [
+    "sponsored", "sponsor", "paid partnership", "partnered with", "#ad", "ad", "advertisement",
+    "affiliate", "promo code", "discount code", "link in bio", "link in the description",
+    "free product", "gifted", "giveaway", "guaranteed", "guarantee", "cure", "risk free",
+    "100%", "best in the world", "clinically proven", "lose weight", "get rich", "limited time",
+    "buy now", "alcohol", "gambling", "bet", "casino", "tobacco", "vape", "weapon",
+]
+
+_WORD_RE = re.compile(r"\S+")
+_QUOTED_RE = re.compile(r"[\"“']([^\"”']{2,40})[\"”']")
+_HASHTAG_RE = re.compile(r"#\w+")
+
+
+def split_windows(transcript: str, window_words: int = 150, overlap: int = 25) -> List[Dict[str, Any]]:
+    """Splits a transcript into overlapping word windows."""
+    words = _WORD_RE.findall(transcript or "")
+    if not words:
+        return []
+    step = max(1, window_words - max(0, overlap))
+    windows = []
+    for start in range(0, len(words), step):
+        chunk = words[start:start + window_words]
+        windows.append({"index": len(windows), "start_word": start, "text": " ".join(chunk)})
+        if start + window_words >= len(words):
+            break
+    return windows
+
+
+def rule_terms(regulation_rules: str) -> List[str]:
+    """Pulls quoted phrases and hashtags out of retrieved rule text (e.g. "#ad", "Paid partnership")."""
+    terms = {t.strip().lower() for t in _QUOTED_RE.findall(regulation_rules or "")}
+    terms |= {t.lower() for t in _HASHTAG_RE.findall(regulation_rules or "")}
+    return sorted(t for t in terms if t)
+
+
+class KeywordPrescreener:
+    """Local matcher: scores a window by how many distinct risk terms it contains."""
+    def __init__(self, regulation_rules: str = "", saturation: int = 3):
+        terms = set(BASE_RISK_TERMS) | set(rule_terms(regulation_rules))
+        # longest first so multi-word phrases win over their sub-terms
+        alternation = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+        self.pattern = re.compile(rf"(?<![\w#])(?:{alternation})(?!\w)", re.IGNORECASE)
+        self.saturation = saturation
+
+    def score(self, windows: List[Dict[str, Any]]) -> List[float]:
+        scores = []
+        for window in windows:
+            hits = {m.group(0).lower() for m in self.pattern.finditer(window["text"])}
+            scores.append(min(1.0, len(hits) / self.saturation))
+        return scores
+
+
+class BedrockPrescreener:
+    """Small Bedrock model that rates every window in a single batched call."""
+    def __init__(self, model_id: str, regulation_rules: str = ""):
+        from langchain_aws import ChatBedrock
+
+        access_key = (os.getenv("AWS_STORAGE_CONNECTION_STRING") or "").strip().strip('"').strip("'")
+        secret_key = (os.getenv("AWS_OPEN_AI_KEY") or "").strip().strip('"').strip("'")
+        self.llm = ChatBedrock(
+            model_id=model_id,
+            model_kwargs={"temperature": 0.0, "max_tokens": 512},
+            region_name=os.getenv("REGION", "eu-central-1"),
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key
+        )
+        self.regulation_rules = regulation_rules
+        self.fallback = KeywordPrescreener(regulation_rules)
+
+    def score(self, windows: List[Dict[str, Any]]) -> List[float]:
+        from langchain_core.messages import HumanMessage, SystemMessage
+
+        system_prompt = f"""
+        You pre-screen video transcript windows for brand compliance risk.
+        Rules context: {self.regulation_rules[:4000]}
+        For every window return a risk score between 0 (clearly clean) and 1 (likely violation).
+        Respond with JSON only: {{"scores": [{{"index": 0, "score": 0.0}}]}}
+        """
+        user_message = "\n".join(f"[{w['index']}] {w['text']}" for w in windows)
+        try:
+            response = self.llm.invoke([SystemMessage(content=system_prompt), HumanMessage(content=user_message)])
+            content = response.content
+            match = re.search(r"\{.*\}", content, re.DOTALL)
+            data = json.loads(match.group(0) if match else content)
+            by_index = {int(s["index"]): float(s["score"]) for s in data.get("scores", [])}
+            # a window the model skipped is escalated rather than silently cleared
+            return [by_index.get(w["index"], 1.0) for w in windows]
+        except Exception as e:
+            logger.warning(f"Pre-screen model failed: {e}. Falling back to keyword matcher.")
+            return self.fallback.score(windows)
+
+
+def get_prescreener(regulation_rules: str = ""):
+    """Bedrock pre-screen when AWS_PRESCREEN_MODEL is set, local keyword matcher otherwise."""
+    model_id = os.getenv("AWS_PRESCREEN_MODEL")
+    if model_id:
+        return BedrockPrescreener(model_id, regulation_rules)
+    return KeywordPrescreener(regulation_rules)
+
+
+def prescreen_transcript(transcript: str, regulation_rules: str = "", ocr_text: Optional[List[str]] = None, prescreener=None) -> Dict[str, Any]:
+    """
+    Scores transcript windows (plus OCR text as one extra window) and splits them
+    into clean and suspicious sets using PRESCREEN_THRESHOLD.
+    """
+    threshold = float(os.getenv("PRESCREEN_THRESHOLD", "0.3"))
+    windows = split_windows(
+        transcript,
+        window_words=int(os.getenv("PRESCREEN_WINDOW_WORDS", "150")),
+        overlap=int(os.getenv("PRESCREEN_WINDOW_OVERLAP", "25")),
+    )
+    if ocr_text:
+        windows.append({"index": len(windows), "start_word": None, "text": " ".join(ocr_text), "source": "ocr"})
+
+    prescreener = prescreener or get_prescreener(regulation_rules)
+    scores = prescreener.score(windows) if windows else []
+    for window, score in zip(windows, scores):
+        window["score"] = score
+
+    suspicious = [w for w in windows if w["score"] >= threshold]
+    return {
+        "windows": windows,
+        "suspicious": suspicious,
+        "threshold": threshold,
+        "escalate": bool(suspicious),
+    }
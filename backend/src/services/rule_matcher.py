@@ -0,0 +1,259 @@
+'''
+Precompiled matcher for the mechanical compliance rules.
+
+`extract_rules` (run by scripts/index_document.py) pulls disclosure phrases,
+vague/banned terms and duration limits out of the rule PDFs into
+backend/data/rule_index.json. `RuleMatcher` compiles every phrase into a single
+regex alternation and scans transcript + OCR text in one pass, producing
+timestamped complianceIssues without an LLM call.
+'''
+
+import os
+import re
+import json
+import logging
+import functools
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger("rule-matcher")
+
+DEFAULT_INDEX_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data", "rule_index.json"))
+
+# phrases that point at a material connection and therefore need a disclosure; only
+# unambiguous ones, since plain words ("sponsor", "commission", "link in the description")
+# appear in perfectly clean videos
+DISCLOSURE_TRIGGERS = [
+    "thanks to our sponsor", "today's sponsor", "promo code", "discount code", "coupon code",
+    "affiliate link", "affiliate links", "use my code", "partnered with",
+    "paid partnership", "sent me this", "gifted me", "free product",
+]
+
+# a vague term only stands in for a disclosure when it is this close (characters) to a trigger
+TRIGGER_WINDOW_CHARS = 200
+
+AD_FORMATS = ["non-skippable in-stream", "skippable in-stream", "bumper", "in-feed", "masthead", "outstream"]
+_FORMAT_HEADING_RES = {fmt: re.compile(rf"(?<![\w-]){re.escape(fmt)} ads? specs", re.IGNORECASE) for fmt in AD_FORMATS}
+
+_QUOTED_RE = re.compile(r"[“\"]([^”\"]{1,40})[”\"]")
+_HASHTAG_RE = re.compile(r"(?<!\w)#[A-Za-z]+")
+_NEGATIVE_RE = re.compile(r"\b(?:don[’']t|do not|avoid|vague|confusing|not enough|isn[’']t)\b", re.IGNORECASE)
+_LIST_RE = re.compile(r"\b(?:terms like|such as|so are|words like|hashtags like)\b", re.IGNORECASE)
+
+_DURATION_PATTERNS = [
+    (re.compile(r"(\d+)\s*seconds or (?:less|shorter)", re.IGNORECASE), "<="),
+    (re.compile(r"(\d+)\s*seconds\s*\(maximum\)", re.IGNORECASE), "<="),
+    (re.compile(r"(?:shouldn[’']t be above|maximum of)\s*(\d+)\s*seconds", re.IGNORECASE), "<="),
+    (re.compile(r"(\d+)\s*seconds or longer", re.IGNORECASE), ">="),
+]
+
+
+def _clean_term(term: str) -> str:
+    return re.sub(r"\s+", " ", term).strip(" ,.;:").lower()
+
+
+def _sentences(text: str) -> List[str]:
+    flat = re.sub(r"\s+", " ", text)
+    return [s.strip() for s in re.split(r"(?<=[.!?»])\s+|\s»\s", flat) if s.strip()]
+
+
+def extract_rules(text: str, source: str) -> Dict[str, Any]:
+    """Heuristically extracts mechanical rules from one document's text."""
+    disclosure, vague = set(), set()
+    for sentence in _sentences(text):
+        # only terms listed as examples ("terms like ...", "such as ...") count
+        marker = _LIST_RE.search(sentence)
+        if not marker:
+            continue
+        examples = sentence[marker.end():]
+        terms = {_clean_term(t) for t in _QUOTED_RE.findall(examples)}
+        terms |= {_clean_term(t) for t in _HASHTAG_RE.findall(examples)}
+        # placeholder brand used in the FTC examples, not a real term
+        terms = {t for t in terms if t and "acme" not in t and len(t.split()) <= 3}
+        if not terms:
+            continue
+        if _NEGATIVE_RE.search(sentence):
+            vague |= terms
+        else:
+            disclosure |= terms
+
+    phrase_rules = []
+    if disclosure:
+        phrase_rules.append({
+            "id": f"{source}:disclosure-required",
+            "kind": "required",
+            "phrases": sorted(disclosure),
+            "triggers": DISCLOSURE_TRIGGERS,
+            "category": "Disclosure",
+            # a trigger alone is only a hint for the auditor model to confirm
+            "severity": "Warning",
+            "description": "Possible material connection without a clear disclosure",
+            "suggestion": f"Add a clear disclosure such as {', '.join(repr(p) for p in sorted(disclosure)[:3])} before the mention.",
+            "source": source,
+        })
+    if vague:
+        phrase_rules.append({
+            "id": f"{source}:vague-disclosure",
+            "kind": "banned",
+            "phrases": sorted(vague - disclosure),
+            # "thanks" is only a problem when it stands in for a disclosure
+            "triggers": DISCLOSURE_TRIGGERS,
+            "category": "Disclosure",
+            "severity": "Warning",
+            "description": "Vague or confusing disclosure term",
+            "suggestion": "Replace with an unambiguous disclosure like '#ad' or 'sponsored'.",
+            "source": source,
+        })
+
+    metadata_rules = []
+    flat = re.sub(r"\s+", " ", text)
+    headings = sorted((m.start(), fmt) for fmt, heading in _FORMAT_HEADING_RES.items() for m in heading.finditer(flat))
+    for pattern, op in _DURATION_PATTERNS:
+        for match in pattern.finditer(flat):
+            # a limit applies to the ad format whose spec section it sits in
+            sections = [fmt for start, fmt in headings if start < match.start()]
+            applies_to = sections[-1] if sections else None
+            seconds = int(match.group(1))
+            rule_id = f"{source}:{applies_to or 'any'}:duration{op}{seconds}"
+            if any(r["id"] == rule_id for r in metadata_rules):
+                continue
+            metadata_rules.append({
+                "id": rule_id,
+                "field": "duration_s",
+                "op": op,
+                "value": seconds,
+                "applies_to": applies_to,
+                "category": "Ad Format",
+                "severity": "Warning",
+                "description": f"{(applies_to or 'Video').capitalize()} duration must be {'at most' if op == '<=' else 'at least'} {seconds} seconds",
+                "evidence": match.group(0),
+                "source": source,
+            })
+
+    return {"phrase_rules": phrase_rules, "metadata_rules": metadata_rules}
+
+
+def build_index(documents: Dict[str, str]) -> Dict[str, Any]:
+    """Merges per-document extractions ({source: text}) into one index."""
+    index = {"version": 1, "generated_at": datetime.now(timezone.utc).isoformat(), "sources": sorted(documents),
+             "phrase_rules": [], "metadata_rules": []}
+    for source, text in sorted(documents.items()):
+        extracted = extract_rules(text, source)
+        index["phrase_rules"].extend(extracted["phrase_rules"])
+        index["metadata_rules"].extend(extracted["metadata_rules"])
+    return index
+
+
+def _format_ms(ms: Optional[int]) -> Optional[str]:
+    if ms is None:
+        return None
+    seconds = ms // 1000
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class RuleMatcher:
+    """Single-pass phrase automaton plus metadata checks over a loaded rule index."""
+    def __init__(self, index: Dict[str, Any]):
+        self.phrase_rules = index.get("phrase_rules", [])
+        self.metadata_rules = index.get("metadata_rules", [])
+
+        # phrase -> [(rule position, role)]; role is "phrase" or "trigger"
+        self._roles: Dict[str, List[tuple]] = {}
+        for position, rule in enumerate(self.phrase_rules):
+            for phrase in rule.get("phrases", []):
+                self._roles.setdefault(phrase.lower(), []).append((position, "phrase"))
+            for phrase in rule.get("triggers", []):
+                self._roles.setdefault(phrase.lower(), []).append((position, "trigger"))
+
+        self.pattern = None
+        if self._roles:
+            alternation = "|".join(re.escape(p) for p in sorted(self._roles, key=len, reverse=True))
+            self.pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE)
+
+    def __bool__(self) -> bool:
+        return bool(self.phrase_rules or self.metadata_rules)
+
+    def scan(self, transcript: str, ocr_text: Optional[List[str]] = None, segments=None,
+             metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Returns complianceIssue dicts for every deterministic rule hit. Issues that rest
+        on a trigger phrase alone carry `hint: True`: they need the LLM to confirm them.
+        """
+        issues = []
+        # rule position -> role -> [(timestamp, phrase, source index, char offset)]
+        hits: Dict[int, Dict[str, List[tuple]]] = {}
+
+        if self.pattern is not None:
+            sources = [(transcript or "", segments)] + [(line, None) for line in (ocr_text or [])]
+            for source, (text, text_segments) in enumerate(sources):
+                for match in self.pattern.finditer(text):
+                    timestamp = text_segments.timestamp_at(match.start()) if text_segments else None
+                    for position, role in self._roles[match.group(0).lower()]:
+                        hits.setdefault(position, {}).setdefault(role, []).append((timestamp, match.group(0), source, match.start()))
+
+        disclosed = any(rule["kind"] == "required" and hits.get(position, {}).get("phrase")
+                        for position, rule in enumerate(self.phrase_rules))
+
+        for position, rule in enumerate(self.phrase_rules):
+            rule_hits = hits.get(position, {})
+            if rule["kind"] == "banned":
+                if rule.get("triggers") and disclosed:
+                    continue
+                reported = set()
+                for timestamp, phrase, source, offset in rule_hits.get("phrase", []):
+                    if phrase.lower() in reported:
+                        continue
+                    if rule.get("triggers") and not any(
+                        t_source == source and abs(t_offset - offset) <= TRIGGER_WINDOW_CHARS
+                        for _, _, t_source, t_offset in rule_hits.get("trigger", [])
+                    ):
+                        continue
+                    reported.add(phrase.lower())
+                    issues.append(self._issue(rule, f"{rule['description']}: '{phrase}'", timestamp))
+            elif rule["kind"] == "required" and rule_hits.get("trigger"):
+                first_trigger, trigger_phrase = rule_hits["trigger"][0][:2]
+                disclosures = rule_hits.get("phrase", [])
+                if not disclosures:
+                    issues.append(self._issue(rule, f"{rule['description']} ('{trigger_phrase}')", first_trigger, hint=True))
+                elif first_trigger is not None and disclosures[0][0] is not None and disclosures[0][0] > first_trigger:
+                    issues.append(self._issue(rule, f"Disclosure '{disclosures[0][1]}' only appears after the first mention ('{trigger_phrase}')",
+                                              first_trigger, severity="Warning"))
+
+        metadata = metadata or {}
+        for rule in self.metadata_rules:
+            value = metadata.get(rule["field"])
+            if value is None or (rule.get("applies_to") and rule["applies_to"] != (metadata.get("ad_format") or "").lower()):
+                continue
+            passed = value <= rule["value"] if rule["op"] == "<=" else value >= rule["value"]
+            if not passed:
+                issues.append(self._issue(rule, f"{rule['description']} (actual: {round(value)}s)", None))
+        return issues
+
+    @staticmethod
+    def _issue(rule: Dict[str, Any], description: str, timestamp_ms: Optional[int], severity: Optional[str] = None,
+               hint: bool = False) -> Dict[str, Any]:
+        issue = {
+            "category": rule["category"],
+            "description": description,
+            "severity": severity or rule["severity"],
+            "timestamp": _format_ms(timestamp_ms),
+            "suggestion": rule.get("suggestion", ""),
+            "rule_id": rule["id"],
+            "source": "rule_index",
+        }
+        if hint:
+            issue["hint"] = True
+        return issue
+
+
+@functools.lru_cache(maxsize=1)
+def get_rule_matcher() -> RuleMatcher:
+    """Loads and compiles RULE_INDEX_PATH once per process; an empty matcher if it is missing."""
+    path = os.getenv("RULE_INDEX_PATH", DEFAULT_INDEX_PATH)
+    try:
+        with open(path) as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"Rule index not found at {path}; deterministic checks disabled. Run scripts/index_document.py.")
+        index = {}
+    return RuleMatcher(index)
@@ -4,8 +4,12 @@ Connector between Python and AWS for video analysis.
 
 import os 
 import logging 
-import yt_dlp 
-import boto3
+import functools
+from typing import Dict, Any, Tuple
+
+from backend.src.api.telemetry import span, record_bytes
+from backend.src.graph.compact_state import LabelStore, SegmentStore
+from backend.src.services.blob_store import BlobStore
 
 logger = logging.getLogger("video-indexer")
 
@@ -33,6 +37,8 @@ class VideoIndexerService:
             access_key = self.aws_access_key.strip('"').strip("'") if self.aws_access_key else None
             secret_key = self.aws_secret_key.strip('"').strip("'") if self.aws_secret_key else None
 
+            import boto3  # deferred: ~100 ms of the cold import, only needed once the service is built
+
             self.session = boto3.Session(
                 aws_access_key_id=access_key,
                 aws_secret_access_key=secret_key,
@@ -48,6 +54,11 @@ class VideoIndexerService:
 
     def download_youtube_video(self, url: str, output_path: str = "temp_video.mp4") -> str:
         """Downloads a video from YouTube using yt-dlp with browser cookie authentication."""
+        return self.download_youtube_video_with_info(url, output_path)[0]
+
+    def download_youtube_video_with_info(self, url: str, output_path: str = "temp_video.mp4") -> Tuple[str, Dict[str, Any]]:
+        """Like download_youtube_video, but also returns yt-dlp's info dict (duration etc.)."""
+        import yt_dlp  # deferred: heavy import only the indexer needs
         logger.info(f"Downloading YouTube video: {url}")
         
         ydl_opts = {
@@ -60,17 +71,22 @@ class VideoIndexerService:
         }
         
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
-            
-            if not os.path.exists(output_path):
-                # Fallback if merger failed or output template varied
-                if os.path.exists(output_path + ".mp4"):
-                    os.rename(output_path + ".mp4", output_path)
-                else:
-                    raise FileNotFoundError(f"Downloaded file not found at {output_path}")
+            with span("video.download", url=url) as current:
+                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                    info = ydl.extract_info(url, download=True) or {}
+                
+                if not os.path.exists(output_path):
+                    # Fallback if merger failed or output template varied
+                    if os.path.exists(output_path + ".mp4"):
+                        os.rename(output_path + ".mp4", output_path)
+                    else:
+                        raise FileNotFoundError(f"Downloaded file not found at {output_path}")
+
+                size = os.path.getsize(output_path)
+                current.set_attribute("bytes", size)
+                record_bytes("download", size, stage="video.download")
                     
-            return output_path
+            return output_path, info
         except Exception as e:
             logger.error(f"Failed to download YouTube video: {e}")
             raise
@@ -82,7 +98,11 @@ class VideoIndexerService:
         
         logger.info(f"Uploading {local_path} to s3://{bucket}/{key}")
         try:
-            self.s3.upload_file(local_path, bucket, key)
+            with span("s3.upload", bucket=bucket, key=key) as current:
+                size = os.path.getsize(local_path)
+                current.set_attribute("bytes", size)
+                self.s3.upload_file(local_path, bucket, key)
+                record_bytes("upload", size, stage="s3.upload")
             return f"s3://{bucket}/{key}"
         except Exception as e:
             logger.error(f"Failed to upload to S3: {e}")
@@ -92,18 +112,32 @@ class VideoIndexerService:
         """Starts a Rekognition label detection job."""
         logger.info(f"Starting label detection for s3://{bucket}/{video_key}")
         try:
-            response = self.rekognition.start_label_detection(
-                Video={"S3Object": {"Bucket": bucket, "Name": video_key}}
-            )
+            with span("rekognition.start_job", bucket=bucket, key=video_key):
+                response = self.rekognition.start_label_detection(
+                    Video={"S3Object": {"Bucket": bucket, "Name": video_key}}
+                )
             return response["JobId"]
         except Exception as e:
             logger.error(f"Failed to start Rekognition analysis: {e}")
             raise
 
     def get_analysis_results(self, job_id: str):
-        """Retrieves results of a Rekognition label detection job."""
+        """Retrieves results of a Rekognition label detection job, following NextToken pages once it succeeds."""
         try:
-            return self.rekognition.get_label_detection(JobId=job_id)
+            with span("rekognition.poll", job_id=job_id) as current:
+                response = self.rekognition.get_label_detection(JobId=job_id)
+                current.set_attribute("job_status", response.get("JobStatus", "UNKNOWN"))
+
+                # a finished job returns at most 1000 labels per page; collect them all
+                labels = response.setdefault("Labels", [])
+                pages = 1
+                while response.get("JobStatus") == "SUCCEEDED" and response.get("NextToken"):
+                    next_page = self.rekognition.get_label_detection(JobId=job_id, NextToken=response["NextToken"])
+                    labels.extend(next_page.get("Labels", []))
+                    response["NextToken"] = next_page.get("NextToken")
+                    pages += 1
+                current.set_attribute("pages", pages)
+                return response
         except Exception as e:
             logger.error(f"Failed to get Rekognition results: {e}")
             return {}
@@ -112,6 +146,28 @@ class VideoIndexerService:
         """Alias for get_analysis_results to maintain compatibility with nodes.py."""
         return self.get_analysis_results(job_id)
 
+    def analyze_keyframes(self, local_path: str) -> dict:
+        """
+        Image-level alternative to start_video_analysis: samples keyframes locally and
+        runs detect_labels/detect_text on them. Returns a label-detection shaped response.
+        """
+        from backend.src.services.keyframes import sample_keyframes, detect_keyframe_insights, keyframe_settings
+
+        logger.info(f"Sampling keyframes from {local_path}")
+        try:
+            with span("keyframes.sample") as current:
+                keyframes = sample_keyframes(local_path, **keyframe_settings())
+                current.set_attribute("keyframes", len(keyframes))
+            return detect_keyframe_insights(
+                self.rekognition,
+                keyframes,
+                max_workers=int(os.getenv("KEYFRAME_MAX_WORKERS", "8")),
+                batch_size=int(os.getenv("KEYFRAME_BATCH_SIZE", "16")),
+            )
+        except Exception as e:
+            logger.error(f"Keyframe analysis failed: {e}")
+            raise
+
     def start_transcription_job(self, bucket: str, video_key: str, job_name: str) -> str:
         """Starts an AWS Transcribe job for a video file."""
         video_uri = f"s3://{bucket}/{video_key}"
@@ -124,12 +180,13 @@ class VideoIndexerService:
             except:
                 pass
 
-            self.transcribe.start_transcription_job(
-                TranscriptionJobName=job_name,
-                Media={'MediaFileUri': video_uri},
-                MediaFormat='mp4',
-                LanguageCode='en-US'
-            )
+            with span("transcribe.start_job", job_name=job_name):
+                self.transcribe.start_transcription_job(
+                    TranscriptionJobName=job_name,
+                    Media={'MediaFileUri': video_uri},
+                    MediaFormat='mp4',
+                    LanguageCode='en-US'
+                )
             return job_name
         except Exception as e:
             logger.error(f"Failed to start transcription job: {e}")
@@ -137,46 +194,55 @@ class VideoIndexerService:
 
     def get_transcription_text(self, job_name: str) -> str:
         """Retrieves the transcript text from a finished job."""
+        return self.get_transcription_result(job_name)[0]
+
+    def get_transcription_result(self, job_name: str) -> tuple:
+        """Retrieves (transcript text, word items) from a finished job; ("", []) while pending."""
         try:
-            response = self.transcribe.get_transcription_job(TranscriptionJobName=job_name)
-            status = response['TranscriptionJob']['TranscriptionJobStatus']
+            with span("transcribe.poll", job_name=job_name) as current:
+                response = self.transcribe.get_transcription_job(TranscriptionJobName=job_name)
+                status = response['TranscriptionJob']['TranscriptionJobStatus']
+                current.set_attribute("job_status", status)
             
             if status == 'COMPLETED':
                 transcript_url = response['TranscriptionJob']['Transcript']['TranscriptFileUri']
                 # Download transcript JSON
                 import requests
-                transcript_data = requests.get(transcript_url).json()
-                return transcript_data.get('results', {}).get('transcripts', [{}])[0].get('transcript', "")
+                with span("transcribe.fetch_transcript", job_name=job_name):
+                    transcript_response = requests.get(transcript_url)
+                    record_bytes("download", len(transcript_response.content), stage="transcribe.fetch_transcript")
+                    transcript_data = transcript_response.json()
+                results = transcript_data.get('results', {})
+                return results.get('transcripts', [{}])[0].get('transcript', ""), results.get('items', [])
             elif status == 'FAILED':
                 logger.error(f"Transcription job failed: {response['TranscriptionJob'].get('FailureReason')}")
-                return ""
+                return "", []
             else:
                 logger.info(f"Transcription job {job_name} still in progress (status: {status})")
-                return ""
+                return "", []
         except Exception as e:
             logger.error(f"Error fetching transcription results: {e}")
-            return ""
+            return "", []
 
-    def extract_data(self, rek_insights: dict, transcript_text: str = "") -> dict:
+    def extract_data(self, rek_insights: dict, transcript_text: str = "", transcript_items: list = None, video_id: str = "") -> dict:
         """Extracts and cleans relevant data from Rekognition insights and Transcribe results."""
         logger.info("Extracting combined data from Rekognition and Transcribe")
         
         labels = rek_insights.get("Labels", []) if rek_insights else []
-        clean_labels = [
-            {
-                "name": label.get("Label", {}).get("Name"),
-                "confidence": label.get("Label", {}).get("Confidence"),
-                "timestamp": label.get("Timestamp")
-            }
-            for label in labels
-        ]
+        clean_labels = LabelStore.from_rekognition(labels)
+        segments = SegmentStore.from_transcribe_items(transcript_text or "", transcript_items or [])
         
+        # OCR lines from keyframe detect_text, de-duplicated in order of appearance
+        text_detections = rek_insights.get("TextDetections", []) if rek_insights else []
+        ocr_text = list(dict.fromkeys(t.get("DetectedText") for t in text_detections if t.get("DetectedText")))
+
         # Check JobStatus
         job_status = rek_insights.get("JobStatus", "IN_PROGRESS") if rek_insights else "FAILED"
         
         return {
-            "transcript": transcript_text or "",
-            "ocr_text": [],    # Placeholder for Text Detection results
+            "transcript": BlobStore.put(transcript_text or "", key_hint=f"transcript-{video_id}"),
+            "transcript_segments": segments,
+            "ocr_text": ocr_text,
             "video_metadata": clean_labels,
             "final_status": "success" if job_status == "SUCCEEDED" else "failed" if job_status == "FAILED" else "processing"
         }
@@ -190,5 +256,11 @@ class VideoIndexerService:
             "message": message
         }
 
+@functools.lru_cache(maxsize=1)
+def get_video_indexer_service() -> VideoIndexerService:
+    """Process-wide service instance; boto3 clients are thread-safe and costly to recreate per audit."""
+    return VideoIndexerService()
+
+
 # Alias for backward compatibility with existing code (e.g., nodes.py)
 VideoIndexerServices = VideoIndexerService
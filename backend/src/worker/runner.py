@@ -0,0 +1,141 @@
+'''
+Audit worker: pulls jobs from the Redis queue and runs `video_audit_graph`.
+
+    uv run python -m backend.src.worker.runner --processes 2 --concurrency 4
+'''
+
+import os
+import time
+import socket
+import logging
+import argparse
+import threading
+import multiprocessing
+from typing import Callable, Dict, Any, Optional
+
+from dotenv import load_dotenv
+
+from backend.src.services.job_queue import AuditJobQueue
+from backend.src.api.telemetry import configure_telemetry , record_queue_wait
+
+logger = logging.getLogger("audit-worker")
+
+
+def _default_runner(payload: Dict[str, Any]) -> Dict[str, Any]:
+    from backend.src.graph.workflow import run_video_audit
+    return run_video_audit(payload["video_url"], payload.get("video_id"), payload.get("ad_format"))
+
+
+class AuditWorker:
+    """
+    Runs up to `concurrency` audits at once in threads. A housekeeping thread
+    extends the visibility deadline of running jobs and requeues expired ones.
+    """
+    def __init__(self, queue: AuditJobQueue, concurrency: int = 2, poll_interval: float = 1.0,
+                 run_audit: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None, worker_id: Optional[str] = None):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.run_audit = run_audit or _default_runner
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._running: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def process(self, job: Dict[str, Any]):
+        job_id = job["id"]
+        with self._lock:
+            self._running[job_id] = threading.current_thread()
+        try:
+            logger.info(f"[{self.worker_id}] running job {job_id} (attempt {job['attempts']})")
+            record_queue_wait(max(0.0, time.time() - job["enqueued_at"]), mode="redis")
+            result = self.run_audit(job["payload"])
+            # the graph nodes catch AWS errors and report them in the result instead of raising;
+            # only transient ones (flagged retryable) are worth another attempt
+            if result.get("retryable"):
+                self.queue.fail(job_id, "; ".join(str(error) for error in result.get("errors", [])), result)
+            else:
+                self.queue.complete(job_id, result)
+        except Exception as e:
+            self.queue.fail(job_id, str(e))
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+
+    def _consume(self):
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(self.worker_id)
+            except Exception as e:
+                logger.error(f"[{self.worker_id}] failed to claim job: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            self.process(job)
+
+    def _housekeeping(self):
+        interval = max(1.0, self.queue.visibility_timeout / 3)
+        while not self._stop.wait(interval):
+            try:
+                with self._lock:
+                    running = list(self._running)
+                for job_id in running:
+                    self.queue.heartbeat(job_id)
+                requeued = self.queue.requeue_expired()
+                if requeued:
+                    logger.warning(f"[{self.worker_id}] requeued {requeued} expired jobs")
+            except Exception as e:
+                logger.error(f"[{self.worker_id}] housekeeping failed: {e}")
+
+    def start(self):
+        threads = [threading.Thread(target=self._consume, name=f"audit-worker-{i}", daemon=True) for i in range(self.concurrency)]
+        threads.append(threading.Thread(target=self._housekeeping, name="audit-worker-housekeeping", daemon=True))
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        logger.info(f"[{self.worker_id}] started with concurrency {self.concurrency}")
+        threads = self.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.stop()
+
+
+def _worker_process(concurrency: int, poll_interval: float):
+    load_dotenv(override=True)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    # telemetry otherwise turns on at the first span, after the first job's queue wait is recorded
+    configure_telemetry()
+    AuditWorker(AuditJobQueue.from_env(), concurrency=concurrency, poll_interval=poll_interval).run_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run audit workers against the Redis job queue.")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "1")))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "2")), help="Audits per process")
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _worker_process(args.concurrency, args.poll_interval)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_worker_process, args=(args.concurrency, args.poll_interval), daemon=False)
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()